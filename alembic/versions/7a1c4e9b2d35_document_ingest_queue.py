@@ -0,0 +1,36 @@
+"""document ingest queue
+
+Revision ID: 7a1c4e9b2d35
+Revises: 63fd05a7aaa8
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a1c4e9b2d35'
+down_revision: Union[str, Sequence[str], None] = '63fd05a7aaa8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('documents', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('documents', sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('documents', sa.Column('locked_by', sa.String(), nullable=True))
+    op.add_column('documents', sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_documents_status_next_attempt_at', 'documents', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_documents_status_next_attempt_at', table_name='documents')
+    op.drop_column('documents', 'locked_at')
+    op.drop_column('documents', 'locked_by')
+    op.drop_column('documents', 'next_attempt_at')
+    op.drop_column('documents', 'attempts')
@@ -0,0 +1,54 @@
+"""message sequence allocator and composite indexes
+
+Revision ID: c4e82f1a9b60
+Revises: 7a1c4e9b2d35
+Create Date: 2026-10-18 11:02:17.540921
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e82f1a9b60'
+down_revision: Union[str, Sequence[str], None] = '7a1c4e9b2d35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # concurrent streams could allocate the same max()+1; renumber so the unique index can be built
+    op.execute("""
+        UPDATE messages m
+        SET sequence_number = r.rn
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY conversation_id ORDER BY sequence_number, created_at, id
+            ) AS rn
+            FROM messages
+        ) r
+        WHERE m.id = r.id AND m.sequence_number <> r.rn
+    """)
+    op.create_index('ix_messages_conversation_id_sequence_number', 'messages', ['conversation_id', 'sequence_number'], unique=True)
+
+    op.add_column('conversations', sa.Column('next_seq', sa.Integer(), server_default='0', nullable=False))
+    op.execute("""
+        UPDATE conversations c
+        SET next_seq = COALESCE(
+            (SELECT MAX(m.sequence_number) FROM messages m WHERE m.conversation_id = c.id), 0
+        )
+    """)
+
+    op.create_index('ix_conversations_user_id_created_at', 'conversations', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_documents_conversation_id_status', 'documents', ['conversation_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_documents_conversation_id_status', table_name='documents')
+    op.drop_index('ix_conversations_user_id_created_at', table_name='conversations')
+    op.drop_column('conversations', 'next_seq')
+    op.drop_index('ix_messages_conversation_id_sequence_number', table_name='messages')
@@ -0,0 +1,31 @@
+"""document content hash for deduplicated storage
+
+Revision ID: e91d3b7c5a24
+Revises: c4e82f1a9b60
+Create Date: 2026-10-18 15:40:03.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e91d3b7c5a24'
+down_revision: Union[str, Sequence[str], None] = 'c4e82f1a9b60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # existing rows keep a NULL hash and their per-document files and vectors
+    op.add_column('documents', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index('ix_documents_content_hash_status', 'documents', ['content_hash', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_documents_content_hash_status', table_name='documents')
+    op.drop_column('documents', 'content_hash')
@@ -1,17 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sse_starlette.sse import EventSourceResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func ,delete
+from sqlalchemy import func ,delete, tuple_, literal
+from datetime import datetime
+from typing import Literal
 
 
 
 from db.session import get_db
 from services.llm.factory import get_llm_client
+from services.llm.base import TextDelta, Usage, Finish
 from core.config import settings
 from sqlalchemy import select
 
 from db.models.conversation import Conversation
 from db.models.message import Message
+from db.models.document import Document
 from db.models.user import User
 
 
@@ -20,13 +24,21 @@ from api.schemas.conversation import (
     CreateConversationRequest,
     ConversationResponse
 )
-import json
+import asyncio
+from dataclasses import asdict
 from utils.auth_helper import verify_user
-from services.rag.rag_service import RAGService
 from api.schemas.conversation import ConversationMode
-from db.models.document import Document
-from utils.classify_intent import classify_intent
-from utils.memory_helper import create_older_context
+from services.chat.pipeline import gather_message_context, load_document_summaries, DOCUMENT_INTENTS
+from services.chat.response_cache import response_cache
+from services.rag.rag_service import RAGService
+from services.rag.document_store import delete_documents
+from utils.sse import coalesce_deltas
+from services.chat.context_builder import assemble_prompt, prompt_budget
+from utils.background import run_in_background
+from utils.memory_helper import update_conversation_summary
+from utils.sequence_helper import allocate_sequence_number
+from utils.pagination import encode_cursor, decode_cursor
+from cachetools import TTLCache
 
 
 
@@ -34,6 +46,20 @@ from utils.memory_helper import create_older_context
 router = APIRouter()
 
 
+# per-user conversation counts, only computed when a client asks for the total
+_conversation_counts = TTLCache(maxsize=10000, ttl=60)
+
+
+async def count_conversations(db: AsyncSession, user_id: str) -> int:
+    if user_id not in _conversation_counts:
+        total_result = await db.execute(
+            select(func.count(Conversation.id))
+            .where(Conversation.user_id == user_id)
+        )
+        _conversation_counts[user_id] = total_result.scalar()
+    return _conversation_counts[user_id]
+
+
 
 
 @router.post("", response_model=ConversationResponse)
@@ -50,32 +76,55 @@ async def create_conversation(
     db.add(conversation)
     await db.commit()
     await db.refresh(conversation)
+    _conversation_counts.pop(user.id, None)
     return conversation
 
 
 
 @router.get("")
 async def list_conversations(
-    page: int = 1,
-    limit: int = 10,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: str | None = None,
+    direction: Literal["before", "after"] = "before",
+    include_total: bool = False,
     user: User = Depends(verify_user),
     db: AsyncSession = Depends(get_db),
 ):
-    total_result = await db.execute(
-        select(func.count(Conversation.id))
-        .where(Conversation.user_id == user.id)
-    )
-    total_conversations = total_result.scalar()
-    
-    offset = (page - 1) * limit
-    result = await db.execute(
-        select(Conversation)
-        .where(Conversation.user_id == user.id)
-        .order_by(Conversation.created_at.desc())
-        .limit(limit)
-        .offset(offset)
-    )
+    # newest first; "before" pages towards older conversations, "after" back towards newer ones
+    query = select(Conversation).where(Conversation.user_id == user.id)
+    key = tuple_(Conversation.created_at, Conversation.id)
+    if cursor:
+        position = decode_cursor(cursor)
+        try:
+            created_at = datetime.fromisoformat(position["created_at"])
+            anchor = tuple_(literal(created_at), literal(position["id"]))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(key < anchor if direction == "before" else key > anchor)
+
+    if direction == "before":
+        query = query.order_by(Conversation.created_at.desc(), Conversation.id.desc())
+    else:
+        query = query.order_by(Conversation.created_at.asc(), Conversation.id.asc())
+
+    result = await db.execute(query.limit(limit + 1))
     conversations = result.scalars().all()
+    has_more = len(conversations) > limit
+    conversations = conversations[:limit]
+    if direction == "after":
+        conversations.reverse()
+
+    def conversation_cursor(c):
+        return encode_cursor({"created_at": c.created_at.isoformat(), "id": c.id})
+
+    pagination = {
+        "limit": limit,
+        "has_more": has_more,
+        "next_cursor": conversation_cursor(conversations[-1]) if conversations else None,
+        "prev_cursor": conversation_cursor(conversations[0]) if conversations else None,
+    }
+    if include_total:
+        pagination["total_conversations"] = await count_conversations(db, user.id)
     
     return {
         "conversations": [
@@ -86,20 +135,16 @@ async def list_conversations(
                 title=c.title
             ) for c in conversations
         ],
-        "pagination": {
-            "page": page,
-            "limit": limit,
-            "total_conversations": total_conversations,
-            "total_pages": (total_conversations + limit - 1) // limit
-        }
+        "pagination": pagination
     }
 
 
 @router.get("/{conversation_id}")
 async def get_conversation(
     conversation_id: str,
-    page: int = 1,
-    limit: int = 10,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: str | None = None,
+    direction: Literal["before", "after"] = "before",
     user: User = Depends(verify_user),
     db: AsyncSession = Depends(get_db),
 ):
@@ -112,23 +157,29 @@ async def get_conversation(
     if not conv:
         return {"error": "Conversation not found"}
     
-    # total message count
-    total_result = await db.execute(
-        select(func.count(Message.id))
-        .where(Message.conversation_id == conversation_id)
-    )
-    total_messages = total_result.scalar()
-    
-    # paginated messages (most recent first)
-    offset = (page - 1) * limit
-    result = await db.execute(
-        select(Message.role, Message.content, Message.created_at, Message.sequence_number)
-        .where(Message.conversation_id == conversation_id)
-        .order_by(Message.sequence_number.desc())
-        .limit(limit)
-        .offset(offset)
+    # pages are seeks on (conversation_id, sequence_number); "before" is older messages
+    query = select(Message.role, Message.content, Message.created_at, Message.sequence_number).where(
+        Message.conversation_id == conversation_id
     )
+    if cursor:
+        seq = decode_cursor(cursor).get("seq")
+        if not isinstance(seq, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(
+            Message.sequence_number < seq if direction == "before" else Message.sequence_number > seq
+        )
+
+    if direction == "before":
+        query = query.order_by(Message.sequence_number.desc())
+    else:
+        query = query.order_by(Message.sequence_number.asc())
+
+    result = await db.execute(query.limit(limit + 1))
     messages = result.all()
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    if direction == "before":
+        messages.reverse()
     
     return {
         "conversation_id": conv.id,
@@ -139,13 +190,16 @@ async def get_conversation(
                 "content": m.content,
                 "created_at": m.created_at,
             }
-            for m in reversed(messages)  
+            for m in messages
         ],
         "pagination": {
-            "page": page,
             "limit": limit,
-            "total_messages": total_messages,
-            "total_pages": (total_messages + limit - 1) // limit
+            "has_more": has_more,
+            # oldest message on the page continues backwards, newest continues forwards
+            "prev_cursor": encode_cursor({"seq": messages[0].sequence_number}) if messages else None,
+            "next_cursor": encode_cursor({"seq": messages[-1].sequence_number}) if messages else None,
+            # allocated sequence numbers; exact unless a stream failed mid-way
+            "total_messages": conv.next_seq,
         }
     }
 
@@ -167,9 +221,16 @@ async def delete_conversation(
     await db.execute(
         delete(Message).where(Message.conversation_id == conversation_id)
     )
-    
+
+    docs_result = await db.execute(
+        select(Document).where(Document.conversation_id == conversation_id)
+    )
+    # commits; files and vectors shared with other conversations are kept
+    await delete_documents(db, list(docs_result.scalars().all()))
+
     await db.delete(conv)
     await db.commit()
+    _conversation_counts.pop(user.id, None)
     
     return {"status": "deleted"}
 
@@ -192,11 +253,7 @@ async def stream_message(
     if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
-    seq_result = await db.execute(
-        select(func.coalesce(func.max(Message.sequence_number), 0) + 1)
-        .where(Message.conversation_id == conversation_id)
-    )
-    user_seq = seq_result.scalar()
+    user_seq = await allocate_sequence_number(db, conversation_id)
 
     user_msg = Message(
         conversation_id=conversation_id,
@@ -205,108 +262,103 @@ async def stream_message(
         sequence_number=user_seq
     )
     db.add(user_msg)
-    await db.commit()
 
-    
-    
-    
+    # the user message is stored while intent, history and retrieval are resolved
     llm = get_llm_client()
-    intent = await classify_intent(llm, payload["message"])
-    older_context = await create_older_context(db,conv)
+    _, (intent, older_context, chunks, doc_keys) = await asyncio.gather(
+        db.commit(),
+        gather_message_context(llm, conv, payload["message"], before_seq=user_seq),
+    )
 
-        
-    # Build messages based on conversation mode
-    context = None
-    if intent in ["DOCUMENT_QA", "DOCUMENT_SUMMARY"]:
-        docs_result = await db.execute(
-            select(Document.id)
-            .where(
-                Document.conversation_id == conversation_id,
-                Document.status == "COMPLETED"
-            )
-        )
-        doc_ids = [row[0] for row in docs_result.all()]
-        
-        if  doc_ids:
-            relevant_chunks = await RAGService.retrieve(
-                    query=payload["message"],
-                    document_ids=doc_ids,  
-                    top_k=3
-                )
-        
-            context = "\n\n".join(relevant_chunks)
-        else:
-            intent = "OPEN_CHAT"
-        
-        
+    messages, prompt_plan = assemble_prompt(
+        payload["message"],
+        chunks,
+        older_context,
+        budget=prompt_budget(llm.model),
+    )
 
-    if context:
-        system_context = {
-                "role": "system",
-                "content": f"You are a helpful assistant. Answer questions based ONLY on the provided context. If the answer is not in the context, say you don't know. Following is the context :\n{context}"
-            }
-    else:
-        system_context = {"role": "system", "content": "You are a helpful assistant"}
+    # answers over documents don't depend on the chat history, so near-identical
+    # questions against the same documents can reuse an earlier answer
+    precomputed_summary = None
+    if intent == "DOCUMENT_SUMMARY" and doc_keys:
+        precomputed_summary = await load_document_summaries(conversation_id)
 
-    messages = [
-        system_context,
-        *older_context,
-        {"role": "user", "content": payload["message"]}
-    ]
+    cache_key, query_embedding, cached = None, None, None
+    if response_cache is not None and doc_keys and intent in DOCUMENT_INTENTS and precomputed_summary is None:
+        cache_key, query_embedding = await asyncio.gather(
+            response_cache.scope_key(user.id, intent, doc_keys),
+            RAGService.embed_query(payload["message"]),
+        )
+        cached = await response_cache.lookup(cache_key, query_embedding)
 
    
     async def event_generator():
-        full_response = ""
+        reply: list[str] = []
         metadata = {
             "model": None,
             "finish_reason": None,
             "prompt_tokens": 0,
             "completion_tokens": 0,
             "total_tokens": 0,
-            "conversation_mode": conv.conversation_mode.value
+            "conversation_mode": conv.conversation_mode.value,
+            "prompt_plan": prompt_plan.to_dict()
         }
         
-        async for chunk in llm.stream_generate(
-            messages,
-            temperature=settings.LLM_TEMPERATURE,
-            max_tokens=settings.LLM_MAX_TOKENS,
-        ):
-            try:
-                data = json.loads(chunk)
-                
-                if not metadata["model"]:
-                    metadata["model"] = data.get("model")
-                
-                choice = data.get("choices", [{}])[0]
-                content = choice.get("delta", {}).get("content", "")
-                if content:
-                    full_response += content
-                    yield {"data": content}
-                
-                if choice.get("finish_reason"):
-                    metadata["finish_reason"] = choice["finish_reason"]
-                if "usage" in data:
-                    metadata.update(data["usage"])
-                    
-            except json.JSONDecodeError:
-                continue
+        if cached is not None:
+            metadata["model"] = cached["metadata"].get("model")
+            metadata["finish_reason"] = cached["metadata"].get("finish_reason")
+            metadata["cached"] = True
+            metadata["cache_similarity"] = cached["similarity"]
+            reply.append(cached["answer"])
+            yield {"data": cached["answer"]}
+        elif precomputed_summary is not None:
+            metadata["finish_reason"] = "stop"
+            metadata["precomputed_summary"] = True
+            reply.append(precomputed_summary)
+            yield {"data": precomputed_summary}
+        else:
+            events = coalesce_deltas(
+                llm.stream_generate(
+                    messages,
+                    temperature=settings.LLM_TEMPERATURE,
+                    max_tokens=settings.LLM_MAX_TOKENS,
+                ),
+                max_chars=settings.SSE_COALESCE_MAX_CHARS,
+                max_delay=settings.SSE_COALESCE_MAX_DELAY_MS / 1000,
+            )
+            async for event in events:
+                if isinstance(event, TextDelta):
+                    reply.append(event.content)
+                    yield {"data": event.content}
+                elif isinstance(event, Usage):
+                    metadata.update(asdict(event))
+                elif isinstance(event, Finish):
+                    metadata["finish_reason"] = event.reason
+                    metadata["model"] = event.model
+            metadata["model"] = metadata["model"] or llm.model
+
+            # truncated answers aren't worth replaying
+            if query_embedding is not None and metadata["finish_reason"] != "length":
+                run_in_background(response_cache.store(
+                    cache_key,
+                    query_embedding,
+                    "".join(reply),
+                    {"model": metadata["model"], "finish_reason": metadata["finish_reason"]},
+                ))
         
-        seq_result = await db.execute(
-            select(func.coalesce(func.max(Message.sequence_number), 0) + 1)
-            .where(Message.conversation_id == conversation_id)
-        )
-        assistant_seq = seq_result.scalar()
+        assistant_seq = await allocate_sequence_number(db, conversation_id)
         
         assistant_msg = Message(
             conversation_id=conversation_id,
             role="assistant",
-            content=full_response,
+            content="".join(reply),
             sequence_number=assistant_seq,
             tokens_used=metadata.get("total_tokens"),
             meta_data=metadata
         )
         db.add(assistant_msg)
         await db.commit()
+        run_in_background(update_conversation_summary(conversation_id))
         yield {"event": "done", "data": "[DONE]"}
     
     return EventSourceResponse(event_generator())
\ No newline at end of file
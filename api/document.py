@@ -1,4 +1,4 @@
-from fastapi import APIRouter, UploadFile, File, Form,Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from db.session import get_db
 from db.models.document import Document
@@ -7,72 +7,105 @@ from db.models.conversation import Conversation
 from utils.auth_helper import verify_user
 from sqlalchemy import select
 from fastapi.exceptions import HTTPException
-import aiofiles
-import os
-from fastapi import BackgroundTasks
-from services.rag.rag_service import RAGService
-import PyPDF2
-import io
-
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+from core.config import settings
+from services.rag.ingest_queue import notify_ingest_queue
+from services.rag.document_store import (
+    delete_documents,
+    discard_staged,
+    find_completed,
+    lock_content,
+    stage_multipart,
+    store_content,
+)
 
 router = APIRouter()
 
-@router.post("/upload", status_code=202)
+# the body is parsed by hand (see stage_multipart), so describe the form for /docs
+_UPLOAD_FORM = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["files", "conversation_id"],
+                    "properties": {
+                        "files": {"type": "array", "items": {"type": "string", "format": "binary"}},
+                        "conversation_id": {"type": "string"},
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+@router.post("/upload", status_code=202, openapi_extra=_UPLOAD_FORM)
 async def upload_documents(
-    files: list[UploadFile] = File(...),
-    conversation_id: str = Form(...),
+    request: Request,
     user: User = Depends(verify_user),
     db: AsyncSession = Depends(get_db),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
 ):
-    # Verify conversation belongs to user
-    conv_result = await db.execute(
-        select(Conversation)
-        .where(Conversation.id == conversation_id, Conversation.user_id == user.id)
-    )
-    conv = conv_result.scalar_one_or_none()
-    
-    if not conv:
-        raise HTTPException(status_code=404, detail="Conversation not found")
-    
+    # files go to staging as they stream in, each capped at UPLOAD_MAX_FILE_BYTES;
+    # the whole body is capped by BodySizeLimitMiddleware
+    fields, staged = await stage_multipart(request, settings.UPLOAD_MAX_FILE_BYTES, settings.UPLOAD_CHUNK_BYTES)
+
     uploaded_docs = []
-    
-    for file in files:
-        content = await file.read()
-        file_size = len(content)
-        
-        doc = Document(
-            conversation_id=conversation_id,
-            user_id=user.id,
-            name=file.filename,
-            file_size=file_size,
-            file_type=file.content_type,
-            status="PROCESSING"
+    try:
+        conversation_id = fields.get("conversation_id")
+        if not conversation_id or not staged:
+            raise HTTPException(status_code=422, detail="files and conversation_id are required")
+
+        # Verify conversation belongs to user
+        conv_result = await db.execute(
+            select(Conversation)
+            .where(Conversation.id == conversation_id, Conversation.user_id == user.id)
         )
-        db.add(doc)
-        await db.flush()  # doc.id without committing
-        
-        # Save to local storage for now (TODO: Move to S3)
-        file_path = os.path.join(UPLOAD_DIR, f"{doc.id}_{file.filename}")
-        async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(content)
-        
-        doc.storage_path = file_path
-
-        background_tasks.add_task(process_document, doc.id, file_path, db)
-        
-        # TODO: Trigger Step Function for processing
-        # await trigger_processing(doc.id)
-        
-        uploaded_docs.append({
-            "document_id": doc.id,
-            "name": doc.name,
-            "status": doc.status
-        })
-    
+        conv = conv_result.scalar_one_or_none()
+
+        if not conv:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+
+        # held until commit, so garbage collection can't remove the file or vectors we reuse;
+        # taken in hash order so two uploads of the same files can't deadlock on each other
+        for content_hash in sorted({file.content_hash for file in staged}):
+            await lock_content(db, content_hash)
+
+        for file in staged:
+            # Save to local storage for now (TODO: Move to S3)
+            file_path = store_content(file.content_hash, file.path)
+
+            # same bytes already ingested: share its chunks instead of embedding again
+            existing = await find_completed(db, file.content_hash)
+
+            doc = Document(
+                conversation_id=conversation_id,
+                user_id=user.id,
+                name=file.filename,
+                file_size=file.size,
+                file_type=file.content_type,
+                content_hash=file.content_hash,
+                storage_path=file_path,
+                status="COMPLETED" if existing else "PROCESSING",
+                meta_data=dict(existing.meta_data or {}) if existing else None,
+            )
+            db.add(doc)
+            await db.flush()  # doc.id without committing
+
+            uploaded_docs.append({
+                "document_id": doc.id,
+                "name": doc.name,
+                "status": doc.status
+            })
+    finally:
+        # no-ops for files already moved into the store
+        for file in staged:
+            discard_staged(file.path)
+
+    # committed PROCESSING rows are the queue; ingest workers pick them up
     await db.commit()
+    if any(doc["status"] == "PROCESSING" for doc in uploaded_docs):
+        notify_ingest_queue()
     
     return {
         "documents": uploaded_docs,
@@ -80,41 +113,19 @@ async def upload_documents(
     }
 
 
-async def process_document(document_id: str, file_path: str, db: AsyncSession):
-    """Background task to chunk and embed document"""
-    try:
-        chunks = []
-        with open(file_path, 'rb') as f:
-            pdf_reader = PyPDF2.PdfReader(f)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-        
-        chunk_size = 500
-        overlap = 50
-        for i in range(0, len(text), chunk_size - overlap):
-            chunk = text[i:i + chunk_size].strip()
-            if chunk:
-                chunks.append(chunk)
-        
-        await RAGService.add_document_chunks(document_id, chunks)
-        
-        result = await db.execute(
-            select(Document).where(Document.id == document_id)
-        )
-        doc = result.scalar_one_or_none()
-        if doc:
-            doc.status = "COMPLETED"
-            doc.meta_data = {"chunks_count": len(chunks)}
-            await db.commit()
-            
-    except Exception as e:
-        result = await db.execute(
-            select(Document).where(Document.id == document_id)
-        )
-        doc = result.scalar_one_or_none()
-        if doc:
-            doc.status = "FAILED"
-            doc.error_message = str(e)
-            await db.commit()
+@router.delete("/{document_id}")
+async def delete_document(
+    document_id: str,
+    user: User = Depends(verify_user),
+    db: AsyncSession = Depends(get_db),
+):
+    result = await db.execute(
+        select(Document).where(Document.id == document_id, Document.user_id == user.id)
+    )
+    doc = result.scalar_one_or_none()
+
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
 
+    await delete_documents(db, [doc])
+    return {"status": "deleted"}
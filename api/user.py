@@ -5,9 +5,9 @@ from db.models.user import User
 from db.session import get_db
 from api.schemas.user import LoginRequest,SignupRequest,RefreshTokenRequest
 from core.config import settings
-from passlib.hash import pbkdf2_sha256
 from utils.auth_helper import create_token,verify_refresh_token,verify_user
-from sqlalchemy import select
+from utils.password_helper import password_hasher
+from sqlalchemy import select, update
 
 
 
@@ -22,7 +22,7 @@ async def signup(request: SignupRequest,db: AsyncSession = Depends(get_db)):
     if user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
     
-    new_user = User(email=email, password=pbkdf2_sha256.hash(password))
+    new_user = User(email=email, password=await password_hasher.hash(password))
     db.add(new_user)
     await db.commit()
     await db.refresh(new_user)
@@ -39,8 +39,13 @@ async def login(request_data: LoginRequest,request:Request, db: AsyncSession = D
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-    if not pbkdf2_sha256.verify(password, user.password):
+    valid, new_hash = await password_hasher.verify_and_update(password, user.password)
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect username or password")
+    if new_hash:
+        # stored with outdated hash parameters, upgrade while we have the plaintext
+        await db.execute(update(User).where(User.id == user.id).values(password=new_hash))
+        await db.commit()
     
     access_token = await create_token(data={"sub": user.email},type="access",expires_minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     refresh_token = await create_token(data={"sub": user.email},type="refresh",expires_minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
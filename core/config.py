@@ -17,16 +17,150 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 60
     SECRET_KEY: str = os.getenv("SECRET_KEY")
     ALGORITHM: str = "HS256"
+    AUTH_CACHE_TTL: int = int(os.getenv("AUTH_CACHE_TTL", "30"))
+    AUTH_CACHE_SIZE: int = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+
+    # Password hashing (pbkdf2_sha256), run on a bounded pool off the event loop
+    PASSWORD_HASH_ROUNDS: int = int(os.getenv("PASSWORD_HASH_ROUNDS", "29000"))
+    PASSWORD_HASH_EXECUTOR: str = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")  # thread | process
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "100"))
 
     # LLM
-    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "groq")  # groq | gemini | ollama
+    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "groq")  # groq | openai | gemini | mock
     LLM_TEMPERATURE: float = float(os.getenv("LLM_TEMPERATURE", "0.3"))
     LLM_MAX_TOKENS: int = int(os.getenv("LLM_MAX_TOKENS", "1024"))
+    LLM_CONTEXT_WINDOW: int = int(os.getenv("LLM_CONTEXT_WINDOW", "8192"))  # for models not in MODEL_CONTEXT_WINDOWS
+    LLM_PROMPT_TOKEN_BUDGET: int = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "6000"))
+    PROMPT_TOKENIZER: str = os.getenv("PROMPT_TOKENIZER", "heuristic")  # heuristic | embedding
+    CONTEXT_RAG_SHARE: float = float(os.getenv("CONTEXT_RAG_SHARE", "0.6"))
 
     GROQ_API_KEY: str | None = os.getenv("GROQ_API_KEY", None)
+    GROQ_MODEL: str = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+    OPENAI_API_KEY: str | None = os.getenv("OPENAI_API_KEY", None)
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+    OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
     GEMINI_API_KEY: str | None = os.getenv("GEMINI_API_KEY", None)
+    GEMINI_MODEL: str = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+
+    # Merge tiny deltas into larger SSE frames; 0 sends every delta as it arrives
+    SSE_COALESCE_MAX_CHARS: int = int(os.getenv("SSE_COALESCE_MAX_CHARS", "0"))
+    SSE_COALESCE_MAX_DELAY_MS: float = float(os.getenv("SSE_COALESCE_MAX_DELAY_MS", "0"))
+
+    # Multi-provider routing, e.g. "groq,openai"; empty means LLM_PROVIDER alone
+    LLM_ROUTER_PROVIDERS: str = os.getenv("LLM_ROUTER_PROVIDERS", "")
+    LLM_ROUTER_WINDOW: int = int(os.getenv("LLM_ROUTER_WINDOW", "50"))
+    LLM_HEDGE_ENABLED: bool = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+    LLM_HEDGE_MIN_DELAY_MS: float = float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "100"))
+    LLM_HEDGE_MAX_DELAY_MS: float = float(os.getenv("LLM_HEDGE_MAX_DELAY_MS", "2000"))
+    LLM_BREAKER_FAILURES: int = int(os.getenv("LLM_BREAKER_FAILURES", "3"))
+    LLM_BREAKER_COOLDOWN_SECONDS: float = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+
+    # Local mock provider for offline load tests
+    MOCK_TOKENS_PER_SEC: float = float(os.getenv("MOCK_TOKENS_PER_SEC", "50"))
+    MOCK_LATENCY_MS: float = float(os.getenv("MOCK_LATENCY_MS", "200"))
+    MOCK_RESPONSE_TOKENS: int = int(os.getenv("MOCK_RESPONSE_TOKENS", "200"))
+    MOCK_ERROR_RATE: float = float(os.getenv("MOCK_ERROR_RATE", "0"))
     OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 
+    # Intent classification: local nearest-centroid first, LLM only when ambiguous
+    INTENT_CONFIDENCE_THRESHOLD: float = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.45"))
+    INTENT_MARGIN: float = float(os.getenv("INTENT_MARGIN", "0.05"))
+
+    # Conversation memory
+    CONTEXT_HISTORY_MESSAGES: int = int(os.getenv("CONTEXT_HISTORY_MESSAGES", "6"))
+    SUMMARY_EVERY_N_TURNS: int = int(os.getenv("SUMMARY_EVERY_N_TURNS", "4"))
+    SUMMARY_MAX_TOKENS: int = int(os.getenv("SUMMARY_MAX_TOKENS", "300"))
+
+    # Map-reduce document summaries, precomputed at ingest for DOCUMENT_SUMMARY
+    DOCUMENT_SUMMARY_ON_INGEST: bool = os.getenv("DOCUMENT_SUMMARY_ON_INGEST", "true").lower() == "true"
+    DOCUMENT_SUMMARY_CONCURRENCY: int = int(os.getenv("DOCUMENT_SUMMARY_CONCURRENCY", "4"))
+    DOCUMENT_SUMMARY_GROUP_TOKENS: int = int(os.getenv("DOCUMENT_SUMMARY_GROUP_TOKENS", "3000"))
+    DOCUMENT_SUMMARY_PARTIAL_TOKENS: int = int(os.getenv("DOCUMENT_SUMMARY_PARTIAL_TOKENS", "250"))
+    DOCUMENT_SUMMARY_MAX_TOKENS: int = int(os.getenv("DOCUMENT_SUMMARY_MAX_TOKENS", "500"))
+
+    # LLM HTTP connection pool (one long-lived client per provider)
+    LLM_HTTP2: bool = os.getenv("LLM_HTTP2", "true").lower() == "true"
+    LLM_CONNECT_TIMEOUT: float = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+    LLM_READ_TIMEOUT: float = float(os.getenv("LLM_READ_TIMEOUT", "60"))
+    LLM_MAX_CONNECTIONS: int = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    LLM_KEEPALIVE_EXPIRY: float = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+
+    # Vector store: chroma | numpy (memory-mapped per-document matrices)
+    VECTOR_STORE: str = os.getenv("VECTOR_STORE", "chroma")
+    VECTOR_STORE_PATH: str = os.getenv("VECTOR_STORE_PATH", "cache/vectors")
+    VECTOR_STORE_DTYPE: str = os.getenv("VECTOR_STORE_DTYPE", "float16")  # float16 | float32
+
+    # Chroma: persistent | http | ephemeral
+    CHROMA_MODE: str = os.getenv("CHROMA_MODE", "persistent")
+    CHROMA_PERSIST_PATH: str = os.getenv("CHROMA_PERSIST_PATH", "cache/chroma")
+    CHROMA_HOST: str = os.getenv("CHROMA_HOST", "localhost")
+    CHROMA_PORT: int = int(os.getenv("CHROMA_PORT", "8001"))
+    CHROMA_RECONCILE_ON_STARTUP: bool = os.getenv("CHROMA_RECONCILE_ON_STARTUP", "true").lower() == "true"
+
+    # Uploads
+    UPLOAD_MAX_FILE_BYTES: int = int(os.getenv("UPLOAD_MAX_FILE_BYTES", str(50 * 1024 * 1024)))
+    UPLOAD_MAX_REQUEST_BYTES: int = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(200 * 1024 * 1024)))
+    UPLOAD_CHUNK_BYTES: int = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+
+    # PDF text extraction, spread over a process pool in ranges of pages
+    PDF_EXTRACTOR: str = os.getenv("PDF_EXTRACTOR", "pypdf2")
+    PDF_EXTRACT_WORKERS: int = int(os.getenv("PDF_EXTRACT_WORKERS", "0"))  # 0 = os.cpu_count()
+    PDF_PAGES_PER_TASK: int = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+    PDF_EXTRACT_WINDOW: int = int(os.getenv("PDF_EXTRACT_WINDOW", "0"))  # ranges in flight per document, 0 = 2 x workers
+    PDF_PAGE_TIMEOUT_SECONDS: float = float(os.getenv("PDF_PAGE_TIMEOUT_SECONDS", "30"))
+
+    # Chunking: token (sentence-aware, sized by the embedding tokenizer) | fixed (character windows)
+    CHUNKER: str = os.getenv("CHUNKER", "token")
+    CHUNK_MAX_TOKENS: int = int(os.getenv("CHUNK_MAX_TOKENS", "250"))  # all-MiniLM-L6-v2 truncates at 256 incl. special tokens
+    CHUNK_OVERLAP_TOKENS: int = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+    CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "500"))
+    CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "50"))
+    CHUNK_DEDUP: bool = os.getenv("CHUNK_DEDUP", "true").lower() == "true"
+
+    # Embeddings
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    EMBEDDING_WORKERS: int = int(os.getenv("EMBEDDING_WORKERS", "1"))  # batch encodes (ingest)
+    EMBEDDING_QUERY_WORKERS: int = int(os.getenv("EMBEDDING_QUERY_WORKERS", "1"))  # single-text encodes (chat)
+    VECTOR_WRITE_BATCH_SIZE: int = int(os.getenv("VECTOR_WRITE_BATCH_SIZE", "256"))
+
+    # Ingestion queue (documents table, claimed with FOR UPDATE SKIP LOCKED)
+    INGEST_EMBEDDED_WORKER: bool = os.getenv("INGEST_EMBEDDED_WORKER", "false").lower() == "true"  # dev only: ingest in the API process
+    INGEST_WORKER_PROCESSES: int = int(os.getenv("INGEST_WORKER_PROCESSES", "1"))
+    INGEST_WORKER_CONCURRENCY: int = int(os.getenv("INGEST_WORKER_CONCURRENCY", "2"))
+    INGEST_MAX_ATTEMPTS: int = int(os.getenv("INGEST_MAX_ATTEMPTS", "5"))
+    INGEST_RETRY_BACKOFF_SECONDS: float = float(os.getenv("INGEST_RETRY_BACKOFF_SECONDS", "10"))
+    INGEST_RETRY_BACKOFF_MAX_SECONDS: float = float(os.getenv("INGEST_RETRY_BACKOFF_MAX_SECONDS", "600"))
+    INGEST_POLL_INTERVAL: float = float(os.getenv("INGEST_POLL_INTERVAL", "2"))
+    INGEST_LEASE_SECONDS: int = int(os.getenv("INGEST_LEASE_SECONDS", "300"))
+
+    # Retrieval: dense search, fused with BM25 by reciprocal rank, optionally cross-encoder reranked
+    RETRIEVAL_TOP_K: int = int(os.getenv("RETRIEVAL_TOP_K", "3"))
+    HYBRID_SEARCH: bool = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+    HYBRID_CANDIDATES: int = int(os.getenv("HYBRID_CANDIDATES", "20"))  # taken from each search before fusion
+    RRF_K: int = int(os.getenv("RRF_K", "60"))
+    BM25_INDEX_PATH: str = os.getenv("BM25_INDEX_PATH", "cache/bm25")
+    BM25_K1: float = float(os.getenv("BM25_K1", "1.5"))
+    BM25_B: float = float(os.getenv("BM25_B", "0.75"))
+    RERANK_ENABLED: bool = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+    RERANK_MODEL: str = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    RERANK_TOP_N: int = int(os.getenv("RERANK_TOP_N", "10"))
+
+    # RAG cache: memory | redis | none
+    RAG_CACHE_BACKEND: str = os.getenv("RAG_CACHE_BACKEND", "memory")
+    RAG_CACHE_TTL: int = int(os.getenv("RAG_CACHE_TTL", "600"))
+    RAG_EMBEDDING_CACHE_SIZE: int = int(os.getenv("RAG_EMBEDDING_CACHE_SIZE", "2048"))
+    RAG_RETRIEVAL_CACHE_SIZE: int = int(os.getenv("RAG_RETRIEVAL_CACHE_SIZE", "1024"))
+
+    # Semantic cache of answers to document questions: none | memory | redis
+    RESPONSE_CACHE_BACKEND: str = os.getenv("RESPONSE_CACHE_BACKEND", "none")
+    RESPONSE_CACHE_TTL: int = int(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+    RESPONSE_CACHE_SIZE: int = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+    RESPONSE_CACHE_ENTRIES_PER_SCOPE: int = int(os.getenv("RESPONSE_CACHE_ENTRIES_PER_SCOPE", "32"))
+    RESPONSE_CACHE_SIMILARITY: float = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.92"))
+
     
 
 
@@ -1,4 +1,19 @@
 import chromadb
+from core.config import settings
 
-client = chromadb.Client()
+
+def _create_client():
+    # ephemeral: in-process and lost on restart, only useful for a single dev worker
+    # persistent: on-disk store, safe for one process at a time
+    # http: a shared `chroma run` server, required for --workers N and separate ingest workers
+    if settings.CHROMA_MODE == "http":
+        return chromadb.HttpClient(host=settings.CHROMA_HOST, port=settings.CHROMA_PORT)
+    if settings.CHROMA_MODE == "persistent":
+        return chromadb.PersistentClient(path=settings.CHROMA_PERSIST_PATH)
+    if settings.CHROMA_MODE == "ephemeral":
+        return chromadb.Client()
+    raise ValueError("Unsupported CHROMA_MODE")
+
+
+client = _create_client()
 collection = client.get_or_create_collection(name="documents")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Enum,ARRAY,JSON,ForeignKey
+from sqlalchemy import Column, String, DateTime, Enum,ARRAY,JSON,ForeignKey,Integer,Index
 from sqlalchemy.sql import func
 from db.base import Base
 import enum
@@ -24,3 +24,9 @@ class Conversation(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     meta_data = Column(JSON, nullable=True)
+    # last allocated Message.sequence_number, see utils/sequence_helper.py
+    next_seq = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        Index("ix_conversations_user_id_created_at", "user_id", "created_at"),
+    )
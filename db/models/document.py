@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, JSON, Integer, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, JSON, Integer, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from db.base import Base
 import uuid
@@ -13,9 +13,28 @@ class Document(Base):
     name = Column(String, nullable=False)
     file_size = Column(Integer, nullable=True)
     file_type = Column(String, nullable=True)
-    status = Column(String, default="PROCESSING")  # PROCESSING, COMPLETED, FAILED
+    status = Column(String, default="PROCESSING")  # PROCESSING, COMPLETED, FAILED (dead letter once retries run out)
     storage_path = Column(String, nullable=True)
+    # sha256 of the file; documents with the same hash share one stored file and one set of vectors
+    content_hash = Column(String(64), nullable=True)
     error_message = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     meta_data = Column(JSON, nullable=True)
+
+    # ingestion queue bookkeeping
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    locked_by = Column(String, nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_documents_status_next_attempt_at", "status", "next_attempt_at"),
+        Index("ix_documents_conversation_id_status", "conversation_id", "status"),
+        Index("ix_documents_content_hash_status", "content_hash", "status"),
+    )
+
+    @property
+    def vector_key(self) -> str:
+        """Key of the document's chunks in the vector store; documents uploaded before hashing use their id."""
+        return self.content_hash or self.id
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Integer,Float,JSON
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Integer,Float,JSON,Index
 from sqlalchemy.sql import func
 from db.base import Base
 import uuid
@@ -16,3 +16,7 @@ class Message(Base):
     sequence_number = Column(Integer, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     meta_data = Column(JSON, nullable=True)
+
+    __table_args__ = (
+        Index("ix_messages_conversation_id_sequence_number", "conversation_id", "sequence_number", unique=True),
+    )
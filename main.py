@@ -1,7 +1,53 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from api import conversation, document,user
+from services.llm.factory import get_llm_client
+from services.llm.http_client import close_http_clients
+from services.llm.router import LLMRouter
+from services.chat.response_cache import response_cache
+from services.rag.cache import rag_cache
+from services.rag.ingest_queue import reconcile_vector_store, run_worker
+from services.rag.reranker import load_reranker
+from core.config import settings
+from utils.password_helper import password_hasher
+from utils.body_limit import BodySizeLimitMiddleware
 
-app = FastAPI(title="BOT GPT Backend")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # a cheap request per provider leaves a handshaken connection in the pool, so the first chat doesn't pay for it
+    await get_llm_client().warmup()
+    if settings.RERANK_ENABLED:
+        await asyncio.to_thread(load_reranker)
+
+    # persistent/http stores survive restarts; only re-ingest what they are missing
+    reconcile = None
+    if settings.CHROMA_RECONCILE_ON_STARTUP:
+        reconcile = asyncio.create_task(reconcile_vector_store())
+
+    # without a separate `python worker.py`, ingest in this process
+    ingest_worker = None
+    if settings.INGEST_EMBEDDED_WORKER:
+        ingest_worker = asyncio.create_task(run_worker())
+
+    yield
+
+    if reconcile and not reconcile.done():
+        reconcile.cancel()
+    if ingest_worker:
+        ingest_worker.cancel()
+        with suppress(asyncio.CancelledError):
+            await ingest_worker
+    await close_http_clients()
+
+
+app = FastAPI(title="BOT GPT Backend", lifespan=lifespan)
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_bytes=settings.UPLOAD_MAX_REQUEST_BYTES,
+    paths=("/documents/upload",),
+)
 
 app.include_router(conversation.router, prefix="/conversations")
 app.include_router(document.router, prefix="/documents")
@@ -11,4 +57,10 @@ app.include_router(user.router, prefix="/user")
 
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    health = {"status": "ok", "rag_cache": rag_cache.stats(), "password_hashing": password_hasher.stats()}
+    if response_cache is not None:
+        health["response_cache"] = response_cache.stats()
+    llm = get_llm_client()
+    if isinstance(llm, LLMRouter):
+        health["llm_providers"] = llm.stats()
+    return health
@@ -0,0 +1,122 @@
+"""
+Compare the fixed-window and token-aware chunkers on real PDFs: chunk counts,
+token sizes, embedding time and retrieval recall.
+
+Recall is measured with probes sampled from the documents themselves: a
+sentence is picked at random, the middle of it becomes the query, and a
+probe counts as found when one of the top-k retrieved chunks contains that
+span verbatim (whitespace-insensitive). Spans cut in half by a chunk border
+can't be found, which is exactly what the token chunker tries to avoid.
+
+    python -m scripts.bench_chunker uploads/*.pdf --probes 100 --top-k 1 3 5
+
+(run from the repository root, as a module, so `services` is importable)
+"""
+import argparse
+import random
+import re
+import time
+
+import numpy as np
+
+from services.rag.chunker import FixedWindowChunker, RepeatedLineFilter, TokenChunker, chunk_fingerprint
+from services.rag.embeddings import embed_texts
+from services.rag.extractors import get_extractor
+from core.config import settings
+from utils.tokenizer import embedding_tokenizer
+
+
+_SENTENCE = re.compile(r"[^.!?]+[.!?]")
+_SPACE = re.compile(r"\s+")
+
+
+def squash(text: str) -> str:
+    return _SPACE.sub(" ", text).strip().lower()
+
+
+def read_pages(path: str) -> list[str]:
+    extractor = get_extractor()
+    with extractor.open(path) as document:
+        return [extractor.extract_page(document, n) for n in range(extractor.page_count(document))]
+
+
+def chunk(chunker, pages: list[str], dedup: bool) -> tuple[list[str], int]:
+    chunks, seen, duplicates = [], set(), 0
+    if dedup:
+        line_filter = RepeatedLineFilter()
+        pages = [line_filter(number, text) for number, text in enumerate(pages)]
+    stream = [c for number, text in enumerate(pages) for c in chunker.feed(number, text)]
+    for text, _ in stream + list(chunker.finish()):
+        fingerprint = chunk_fingerprint(text)
+        if dedup and fingerprint in seen:
+            duplicates += 1
+            continue
+        seen.add(fingerprint)
+        chunks.append(text)
+    return chunks, duplicates
+
+
+def sample_probes(pages: list[str], count: int, rng: random.Random) -> list[str]:
+    sentences = [
+        s for s in (squash(m.group()) for m in _SENTENCE.finditer(" ".join(pages)))
+        if 12 <= len(s.split()) <= 60
+    ]
+    probes = []
+    for sentence in rng.sample(sentences, min(count, len(sentences))):
+        words = sentence.split()
+        cut = max(len(words) // 5, 1)
+        probes.append(" ".join(words[cut:-cut]))
+    return probes
+
+
+def evaluate(name: str, chunks: list[str], duplicates: int, probes: list[str], top_ks: list[int], tokenizer):
+    tokens = [tokenizer.count(c) for c in chunks]
+    start = time.perf_counter()
+    matrix = np.asarray(embed_texts(chunks), dtype=np.float32)
+    embed_seconds = time.perf_counter() - start
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+
+    queries = np.asarray(embed_texts(probes), dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    ranked = np.argsort(-(queries @ matrix.T), axis=1)
+
+    squashed = [squash(c) for c in chunks]
+    intact = sum(any(p in c for c in squashed) for p in probes)
+    recall = {
+        k: sum(any(p in squashed[i] for i in ranked[row, :k]) for row, p in enumerate(probes)) / len(probes)
+        for k in top_ks
+    }
+
+    print(f"{name:>6}: {len(chunks)} chunks, {duplicates} duplicates skipped, "
+          f"tokens mean {np.mean(tokens):.0f} / max {max(tokens)}, "
+          f"{sum(t > 254 for t in tokens)} truncated by the model, embedded in {embed_seconds:.2f}s")
+    print(f"{'':>6}  probes intact in some chunk {intact / len(probes):.2%}, "
+          + ", ".join(f"recall@{k} {r:.2%}" for k, r in recall.items()))
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    tokenizer = embedding_tokenizer()
+
+    for path in args.pdfs:
+        pages = read_pages(path)
+        probes = sample_probes(pages, args.probes, rng)
+        print(f"\n{path}: {len(pages)} pages, {len(probes)} probes")
+        if not probes:
+            continue
+
+        fixed, fixed_dups = chunk(FixedWindowChunker(settings.CHUNK_SIZE, settings.CHUNK_OVERLAP), pages, dedup=False)
+        evaluate("fixed", fixed, fixed_dups, probes, args.top_k, tokenizer)
+
+        token_chunker = TokenChunker(tokenizer, settings.CHUNK_MAX_TOKENS, settings.CHUNK_OVERLAP_TOKENS)
+        token, token_dups = chunk(token_chunker, pages, dedup=True)
+        evaluate("token", token, token_dups, probes, args.top_k, tokenizer)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="+")
+    parser.add_argument("--probes", type=int, default=100, help="sampled queries per document")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
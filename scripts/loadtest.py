@@ -0,0 +1,118 @@
+"""
+Drive N concurrent /conversations/{id}/messages/stream sessions and report
+time-to-first-token and throughput percentiles.
+
+Run the server against the local mock provider to measure its own overhead:
+
+    LLM_PROVIDER=mock MOCK_LATENCY_MS=0 MOCK_TOKENS_PER_SEC=1000 uvicorn main:app
+    python scripts/loadtest.py --sessions 50 --messages 3
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    index = min(int(round(pct / 100 * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+async def authenticate(client: httpx.AsyncClient, email: str, password: str) -> str:
+    await client.post("/user/signup", json={"email": email, "password": password})
+    resp = await client.post("/user/login", json={"username": email, "password": password})
+    resp.raise_for_status()
+    return resp.json()["access_token"]
+
+
+async def stream_once(client: httpx.AsyncClient, conversation_id: str, message: str) -> dict:
+    start = time.perf_counter()
+    first_token = None
+    events = 0
+    chars = 0
+    async with client.stream(
+        "POST",
+        f"/{conversation_id}/messages/stream",
+        json={"message": message},
+    ) as resp:
+        resp.raise_for_status()
+        event = None
+        async for line in resp.aiter_lines():
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                if event == "done":
+                    break
+                if first_token is None:
+                    first_token = time.perf_counter()
+                events += 1
+                chars += len(line) - 5
+            elif not line:
+                event = None
+    end = time.perf_counter()
+    return {
+        "ttft": (first_token or end) - start,
+        "duration": end - start,
+        "events": events,
+        "chars": chars,
+    }
+
+
+async def run_session(client: httpx.AsyncClient, messages: int, results: list, errors: list):
+    try:
+        resp = await client.post("", json={"title": "loadtest", "conversation_mode": "OPEN_CHAT"})
+        resp.raise_for_status()
+        conversation_id = resp.json()["id"]
+        for i in range(messages):
+            results.append(await stream_once(client, conversation_id, f"Load test message {i}, tell me something."))
+    except Exception as e:
+        errors.append(repr(e))
+
+
+async def main(args):
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.sessions + 10)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=timeout) as client:
+        email = args.email or f"loadtest-{uuid.uuid4().hex[:8]}@example.com"
+        token = await authenticate(client, email, args.password)
+
+    headers = {"Authorization": f"Bearer {token}"}
+    results, errors = [], []
+    async with httpx.AsyncClient(
+        base_url=f"{args.base_url}/conversations", headers=headers, timeout=timeout, limits=limits
+    ) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(run_session(client, args.messages, results, errors) for _ in range(args.sessions)))
+        elapsed = time.perf_counter() - started
+
+    ttft = [r["ttft"] * 1000 for r in results]
+    rates = [r["events"] / r["duration"] for r in results if r["duration"] > 0]
+    total_events = sum(r["events"] for r in results)
+
+    print(f"sessions={args.sessions} messages/session={args.messages} completed={len(results)} errors={len(errors)}")
+    print(f"wall time: {elapsed:.2f}s  streams/s: {len(results) / elapsed:.2f}  events/s: {total_events / elapsed:.1f}")
+    for name, values, unit in (("TTFT", ttft, "ms"), ("per-stream events/s", rates, "")):
+        if values:
+            print(
+                f"{name}: p50={percentile(values, 50):.1f}{unit} p90={percentile(values, 90):.1f}{unit} "
+                f"p99={percentile(values, 99):.1f}{unit} mean={statistics.mean(values):.1f}{unit}"
+            )
+    for error in errors[:5]:
+        print("error:", error)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent chat sessions")
+    parser.add_argument("--messages", type=int, default=3, help="messages streamed per session")
+    parser.add_argument("--email", default=None, help="existing account; a throwaway one is created by default")
+    parser.add_argument("--password", default="loadtest-password")
+    parser.add_argument("--timeout", type=float, default=120)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,136 @@
+from dataclasses import dataclass, field, asdict
+from core.config import settings
+from utils.tokenizer import get_tokenizer
+
+
+# context windows of the models we call; unknown models fall back to LLM_CONTEXT_WINDOW
+MODEL_CONTEXT_WINDOWS = {
+    "llama-3.1-8b-instant": 131072,
+    "gpt-4o-mini": 128000,
+    "gemini-2.0-flash": 1048576,
+    "mock": 131072,
+}
+
+# role/separator tokens the chat template adds around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+DEFAULT_SYSTEM_PROMPT = "You are a helpful assistant"
+RAG_SYSTEM_PROMPT = (
+    "You are a helpful assistant. Answer questions based ONLY on the provided context. "
+    "If the answer is not in the context, say you don't know. Following is the context :\n"
+)
+
+
+def prompt_budget(model: str) -> int:
+    """Tokens available to the prompt once the completion is reserved."""
+    window = MODEL_CONTEXT_WINDOWS.get(model, settings.LLM_CONTEXT_WINDOW)
+    return min(window - settings.LLM_MAX_TOKENS, settings.LLM_PROMPT_TOKEN_BUDGET)
+
+
+@dataclass
+class PromptPlan:
+    budget: int
+    prompt_tokens: int = 0
+    system_tokens: int = 0
+    context_tokens: int = 0
+    history_tokens: int = 0
+    chunks_used: int = 0
+    chunks_dropped: int = 0
+    history_used: int = 0
+    history_dropped: int = 0
+    truncated: list[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _truncate(tokenizer, text: str, max_tokens: int) -> str:
+    # shrink by the measured ratio until it fits; a couple of passes is enough
+    while text and tokenizer.count(text) > max_tokens:
+        ratio = max_tokens / tokenizer.count(text)
+        text = text[:max(int(len(text) * ratio * 0.95), 0)]
+    return text
+
+
+def assemble_prompt(
+    user_message: str,
+    chunks: list[str] | None,
+    history: list[dict],
+    budget: int,
+    tokenizer=None,
+) -> tuple[list[dict], PromptPlan]:
+    """
+    Fit the prompt into `budget` tokens. Priority: system instruction and the new
+    message, then the highest-ranked chunks and the summary, then the most recent
+    history. RAG context gets up to CONTEXT_RAG_SHARE of what is left and whatever
+    it doesn't use goes to history. Returns the messages and the plan that produced them.
+    """
+    tokenizer = tokenizer or get_tokenizer()
+    plan = PromptPlan(budget=budget)
+
+    def cost(text: str) -> int:
+        return tokenizer.count(text) + MESSAGE_OVERHEAD_TOKENS
+
+    system_prompt = RAG_SYSTEM_PROMPT if chunks else DEFAULT_SYSTEM_PROMPT
+    plan.system_tokens = cost(system_prompt)
+    user_tokens = cost(user_message)
+    remaining = budget - plan.system_tokens - user_tokens
+    if remaining < 0:
+        user_message = _truncate(tokenizer, user_message, max(budget - plan.system_tokens - MESSAGE_OVERHEAD_TOKENS, 0))
+        user_tokens = cost(user_message)
+        plan.truncated.append("user_message")
+        remaining = 0
+
+    # RAG context, best chunks first
+    context_parts = []
+    rag_allowance = int(remaining * settings.CONTEXT_RAG_SHARE)
+    for chunk in chunks or []:
+        chunk_tokens = tokenizer.count(chunk) + 1
+        if plan.context_tokens + chunk_tokens > rag_allowance:
+            break
+        context_parts.append(chunk)
+        plan.context_tokens += chunk_tokens
+    plan.chunks_used = len(context_parts)
+    plan.chunks_dropped = len(chunks or []) - plan.chunks_used
+    if chunks and not context_parts:
+        system_prompt = DEFAULT_SYSTEM_PROMPT
+        plan.system_tokens = cost(system_prompt)
+    remaining -= plan.context_tokens
+
+    # history: summary first, then newest to oldest
+    summary = [m for m in history if m["role"] == "system"]
+    turns = [m for m in history if m["role"] != "system"]
+    kept_summary, kept_turns = [], []
+    for message in summary:
+        message_tokens = cost(message["content"])
+        if message_tokens > remaining:
+            message = {**message, "content": _truncate(tokenizer, message["content"], max(remaining - MESSAGE_OVERHEAD_TOKENS, 0))}
+            message_tokens = cost(message["content"])
+            plan.truncated.append("summary")
+        if message["content"] and message_tokens <= remaining:
+            kept_summary.append(message)
+            remaining -= message_tokens
+            plan.history_tokens += message_tokens
+    for message in reversed(turns):
+        message_tokens = cost(message["content"])
+        if message_tokens > remaining:
+            break
+        kept_turns.append(message)
+        remaining -= message_tokens
+        plan.history_tokens += message_tokens
+    kept_turns.reverse()
+    plan.history_used = len(kept_turns)
+    plan.history_dropped = len(turns) - len(kept_turns)
+
+    if context_parts:
+        system_content = system_prompt + "\n\n".join(context_parts)
+    else:
+        system_content = system_prompt
+    messages = [
+        {"role": "system", "content": system_content},
+        *kept_summary,
+        *kept_turns,
+        {"role": "user", "content": user_message},
+    ]
+    plan.prompt_tokens = plan.system_tokens + plan.context_tokens + plan.history_tokens + user_tokens
+    return messages, plan
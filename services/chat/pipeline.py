@@ -0,0 +1,86 @@
+import asyncio
+from sqlalchemy import func, select
+
+from db.session import AsyncSessionLocal
+from db.models.conversation import Conversation
+from db.models.document import Document
+from services.rag.rag_service import RAGService
+from utils.classify_intent import classify_intent
+from utils.memory_helper import create_older_context
+
+
+DOCUMENT_INTENTS = ("DOCUMENT_QA", "DOCUMENT_SUMMARY")
+
+
+async def _load_history(conversation: Conversation, before_seq: int):
+    async with AsyncSessionLocal() as db:
+        return await create_older_context(db, conversation, before_seq=before_seq)
+
+
+async def _load_document_keys(conversation_id: str):
+    # vector-store keys; copies of the same file share one
+    async with AsyncSessionLocal() as db:
+        docs_result = await db.execute(
+            select(func.coalesce(Document.content_hash, Document.id))
+            .where(
+                Document.conversation_id == conversation_id,
+                Document.status == "COMPLETED"
+            )
+            .distinct()
+        )
+        return [row[0] for row in docs_result.all()]
+
+
+async def load_document_summaries(conversation_id: str) -> str | None:
+    """The precomputed summaries of the conversation's documents, or None if any is still missing."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Document.name, Document.meta_data)
+            .where(Document.conversation_id == conversation_id, Document.status == "COMPLETED")
+            .order_by(Document.created_at)
+        )
+        rows = result.all()
+
+    summaries = [(name, (meta_data or {}).get("summary")) for name, meta_data in rows]
+    if not summaries or not all(summary for _, summary in summaries):
+        return None
+    if len(summaries) == 1:
+        return summaries[0][1]
+    return "\n\n".join(f"**{name}**\n\n{summary}" for name, summary in summaries)
+
+
+async def gather_message_context(llm, conversation: Conversation, message: str, before_seq: int):
+    """
+    Load the history while intent classification and document retrieval run.
+    Retrieval runs speculatively and is thrown away when the intent is OPEN_CHAT.
+    Conversations without COMPLETED documents skip classification entirely.
+    Returns (intent, older_context, chunks, doc_keys) with chunks ranked best first, or None;
+    doc_keys are the vector-store keys of the conversation's documents.
+    """
+    history_task = asyncio.create_task(_load_history(conversation, before_seq))
+    tasks = [history_task]
+
+    try:
+        doc_keys = await _load_document_keys(conversation.id)
+        intent, chunks = "OPEN_CHAT", None
+
+        if doc_keys:
+            intent_task = asyncio.create_task(classify_intent(llm, message))
+            retrieval_task = asyncio.create_task(
+                RAGService.retrieve(query=message, document_ids=doc_keys)
+            )
+            tasks += [intent_task, retrieval_task]
+
+            intent = await intent_task
+            if intent in DOCUMENT_INTENTS:
+                chunks = await retrieval_task
+            else:
+                retrieval_task.cancel()
+
+        older_context = await history_task
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    return intent, older_context, chunks, doc_keys
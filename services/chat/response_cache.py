@@ -0,0 +1,112 @@
+import hashlib
+import logging
+from collections import Counter
+
+import numpy as np
+
+from core.config import settings
+from services.rag.cache import MemoryCacheBackend, RedisCacheBackend, memory_versions_reach_api
+
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Semantic cache of finished answers. Entries are grouped by scope, which is the
+    user, the intent and the versioned set of document ids. A lookup returns the
+    answer whose question embedding is closest to the new one, if it clears the
+    similarity threshold. Each scope keeps its most recent `max_entries` answers, and
+    scopes themselves expire with the backend's TTL/LRU. Bumping a document's version
+    moves every scope that includes it to a new key.
+    """
+
+    def __init__(self, backend, threshold: float, max_entries: int):
+        self._backend = backend
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._stats = Counter()
+
+    async def scope_key(self, user_id: str, intent: str, document_ids: list[str]) -> str | None:
+        document_ids = sorted(set(document_ids))
+        try:
+            versions = await self._backend.get_versions(document_ids)
+        except Exception:
+            logger.exception("Response cache version lookup failed")
+            return None
+        scope = ",".join(f"{doc_id}@{version}" for doc_id, version in zip(document_ids, versions))
+        return f"resp:{user_id}:{intent}:{hashlib.sha256(scope.encode()).hexdigest()}"
+
+    async def _entries(self, key: str) -> list[dict]:
+        try:
+            return await self._backend.get(key) or []
+        except Exception:
+            logger.exception("Response cache read failed")
+            return []
+
+    async def lookup(self, key: str | None, embedding) -> dict | None:
+        """Returns {"answer", "metadata", "similarity"} for the closest cached question, or None."""
+        if key is None:
+            return None
+        entries = await self._entries(key)
+        if not entries:
+            self._stats["misses"] += 1
+            return None
+
+        query = np.asarray(embedding, dtype=np.float32)
+        matrix = np.asarray([entry["embedding"] for entry in entries], dtype=np.float32)
+        scores = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query) + 1e-12)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            self._stats["misses"] += 1
+            return None
+
+        self._stats["hits"] += 1
+        return {
+            "answer": entries[best]["answer"],
+            "metadata": entries[best]["metadata"],
+            "similarity": round(float(scores[best]), 4),
+        }
+
+    async def store(self, key: str | None, embedding, answer: str, metadata: dict):
+        if key is None or not answer:
+            return
+        entries = await self._entries(key)
+        entries = entries[-(self.max_entries - 1):] if self.max_entries > 1 else []
+        entries.append({"embedding": list(embedding), "answer": answer, "metadata": metadata})
+        try:
+            await self._backend.set(key, entries)
+        except Exception:
+            logger.exception("Response cache write failed")
+
+    async def invalidate_documents(self, document_ids: list[str]):
+        try:
+            await self._backend.bump_versions(list(document_ids))
+        except Exception:
+            logger.exception("Response cache invalidation failed")
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        hits, misses = stats.get("hits", 0), stats.get("misses", 0)
+        stats["hit_rate"] = round(hits / (hits + misses), 4) if hits + misses else None
+        return stats
+
+
+def _build_cache() -> ResponseCache | None:
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        backend = RedisCacheBackend(settings.REDIS_URL, ttl=settings.RESPONSE_CACHE_TTL, prefix="resp")
+    elif settings.RESPONSE_CACHE_BACKEND == "memory":
+        if not memory_versions_reach_api("RESPONSE_CACHE_BACKEND"):
+            return None
+        backend = MemoryCacheBackend(settings.RESPONSE_CACHE_SIZE, settings.RESPONSE_CACHE_TTL)
+    else:
+        return None
+    return ResponseCache(
+        backend,
+        threshold=settings.RESPONSE_CACHE_SIMILARITY,
+        max_entries=settings.RESPONSE_CACHE_ENTRIES_PER_SCOPE,
+    )
+
+
+# None unless RESPONSE_CACHE_BACKEND opts in
+response_cache = _build_cache()
@@ -1,8 +1,44 @@
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 from typing import AsyncGenerator
 
 
+@dataclass
+class TextDelta:
+    content: str
+
+
+@dataclass
+class Usage:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+
+
+@dataclass
+class Finish:
+    reason: str | None
+    model: str | None = None
+
+
+StreamEvent = TextDelta | Usage | Finish
+
+
 class BaseLLMClient(ABC):
+    provider: str
+    model: str
+
+    async def warmup(self):
+        """Open connections ahead of the first request."""
+
+    @abstractmethod
+    async def generate(
+        self,
+        messages: list[dict],
+        temperature: float = 0,
+        max_tokens: int = 512
+    ) -> str:
+        ...
 
     @abstractmethod
     async def stream_generate(
@@ -10,5 +46,6 @@ class BaseLLMClient(ABC):
         messages: list[dict],
         temperature: float,
         max_tokens: int
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncGenerator[StreamEvent, None]:
+        """Yields TextDelta for content, then Usage and Finish when the provider reports them."""
         ...
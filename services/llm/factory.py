@@ -1,8 +1,43 @@
 from core.config import settings
+from services.llm.base import BaseLLMClient
+from services.llm.gemini_client import GeminiClient
 from services.llm.groq_client import GroqClient
+from services.llm.mock_client import MockLLMClient
+from services.llm.openai_client import OpenAIClient
+from services.llm.router import LLMRouter
 
 
-def get_llm_client():
-    if settings.LLM_PROVIDER == "groq":
-        return GroqClient()
-    raise ValueError("Unsupported LLM provider")
+PROVIDERS: dict[str, type[BaseLLMClient]] = {
+    "groq": GroqClient,
+    "openai": OpenAIClient,
+    "gemini": GeminiClient,
+    "mock": MockLLMClient,
+}
+
+_llm_clients: dict[str, BaseLLMClient] = {}
+_router: LLMRouter | None = None
+
+
+def get_llm_client(provider: str | None = None) -> BaseLLMClient:
+    """A single provider, or the router over LLM_ROUTER_PROVIDERS when that is set."""
+    global _router
+    if provider is None and settings.LLM_ROUTER_PROVIDERS:
+        if _router is None:
+            _router = LLMRouter(
+                [get_llm_client(name.strip()) for name in settings.LLM_ROUTER_PROVIDERS.split(",") if name.strip()],
+                hedge=settings.LLM_HEDGE_ENABLED,
+                hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+                hedge_min_delay=settings.LLM_HEDGE_MIN_DELAY_MS / 1000,
+                hedge_max_delay=settings.LLM_HEDGE_MAX_DELAY_MS / 1000,
+                window=settings.LLM_ROUTER_WINDOW,
+                breaker_failures=settings.LLM_BREAKER_FAILURES,
+                breaker_cooldown=settings.LLM_BREAKER_COOLDOWN_SECONDS,
+            )
+        return _router
+
+    provider = provider or settings.LLM_PROVIDER
+    if provider not in _llm_clients:
+        if provider not in PROVIDERS:
+            raise ValueError("Unsupported LLM provider")
+        _llm_clients[provider] = PROVIDERS[provider]()
+    return _llm_clients[provider]
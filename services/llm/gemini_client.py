@@ -1,8 +1,90 @@
-import httpx
-from services.llm.base import BaseLLMClient
+import orjson
+from services.llm.base import BaseLLMClient, TextDelta, Usage, Finish
+from services.llm.http_client import get_http_client, raise_for_status, warm_connection
 from core.config import settings
+from utils.sse import iter_sse_data
 
 
 class GeminiClient(BaseLLMClient):
+    provider = "gemini"
+
+    def __init__(self):
+        self.model = settings.GEMINI_MODEL
+
+    @property
+    def client(self):
+        return get_http_client(
+            "gemini",
+            base_url="https://generativelanguage.googleapis.com/v1beta",
+            headers={"x-goog-api-key": settings.GEMINI_API_KEY or ""},
+        )
+
+    async def warmup(self):
+        await warm_connection(self.client, "/models?pageSize=1", self.provider)
+
+    @staticmethod
+    def _payload(messages, temperature, max_tokens):
+        # Gemini takes the system prompt separately and calls the assistant "model"
+        system = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+        payload = {
+            "contents": [
+                {
+                    "role": "model" if m["role"] == "assistant" else "user",
+                    "parts": [{"text": m["content"]}],
+                }
+                for m in messages if m["role"] != "system"
+            ],
+            "generationConfig": {
+                "temperature": temperature,
+                "maxOutputTokens": max_tokens,
+            },
+        }
+        if system:
+            payload["systemInstruction"] = {"parts": [{"text": system}]}
+        return payload
+
     async def stream_generate(self, messages, temperature, max_tokens):
-        pass
\ No newline at end of file
+        usage = None
+        async with self.client.stream(
+            "POST",
+            f"/models/{self.model}:streamGenerateContent",
+            params={"alt": "sse"},
+            json=self._payload(messages, temperature, max_tokens),
+        ) as response:
+            await raise_for_status(response)
+            async for payload in iter_sse_data(response.aiter_bytes()):
+                try:
+                    data = orjson.loads(payload)
+                except orjson.JSONDecodeError:
+                    continue
+
+                candidate = (data.get("candidates") or [{}])[0]
+                for part in (candidate.get("content") or {}).get("parts", []):
+                    if part.get("text"):
+                        yield TextDelta(part["text"])
+
+                # usage metadata is cumulative, only the last one counts
+                if data.get("usageMetadata"):
+                    usage = data["usageMetadata"]
+                if candidate.get("finishReason"):
+                    if usage:
+                        yield Usage(
+                            prompt_tokens=usage.get("promptTokenCount", 0),
+                            completion_tokens=usage.get("candidatesTokenCount", 0),
+                            total_tokens=usage.get("totalTokenCount", 0),
+                        )
+                    yield Finish(
+                        reason=candidate["finishReason"].lower(),
+                        model=data.get("modelVersion", self.model),
+                    )
+
+    async def generate(self, messages, temperature=0, max_tokens=512):
+        resp = await self.client.post(
+            f"/models/{self.model}:generateContent",
+            json=self._payload(messages, temperature, max_tokens),
+        )
+        await raise_for_status(resp)
+
+        data = orjson.loads(resp.content)
+        parts = data["candidates"][0]["content"]["parts"]
+        return "".join(part.get("text", "") for part in parts)
@@ -1,45 +1,14 @@
-import httpx
-from services.llm.base import BaseLLMClient
+from services.llm.openai_client import OpenAICompatibleClient
 from core.config import settings
 
 
-class GroqClient(BaseLLMClient):
+class GroqClient(OpenAICompatibleClient):
+    provider = "groq"
+    base_url = "https://api.groq.com/openai/v1"
 
-    async def stream_generate(self, messages, temperature, max_tokens):
-        async with httpx.AsyncClient(timeout=None) as client:
-            async with client.stream(
-                "POST",
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {settings.GROQ_API_KEY}"
-                },
-                json={
-                    "model": "llama-3.1-8b-instant",
-                    "messages": messages,
-                    "temperature": temperature,
-                    "max_tokens": max_tokens,
-                    "stream": True
-                },
-            ) as response:
-                async for line in response.aiter_lines():
-                    if line.startswith("data: ") and line != "data: [DONE]":
-                        yield line.replace("data: ", "")
+    def __init__(self):
+        self.model = settings.GROQ_MODEL
 
-    async def generate(self, messages, temperature=0, max_tokens=512):
-        async with httpx.AsyncClient(timeout=None) as client:
-            resp = await client.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {settings.GROQ_API_KEY}"
-                },
-                json={
-                    "model": "llama-3.1-8b-instant",
-                    "messages": messages,
-                    "temperature": temperature,
-                    "max_tokens": max_tokens,
-                    "stream": False
-                }
-            )
-
-            data = resp.json()
-            return data["choices"][0]["message"]["content"]
\ No newline at end of file
+    @property
+    def api_key(self):
+        return settings.GROQ_API_KEY
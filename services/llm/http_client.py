@@ -0,0 +1,70 @@
+import logging
+
+import httpx
+from core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# one pooled client per provider, shared by every request in the process
+_clients: dict[str, httpx.AsyncClient] = {}
+
+
+def build_http_client(base_url: str, headers: dict | None = None, transport=None) -> httpx.AsyncClient:
+    # http2 and limits configure the default transport; a custom one (the mock) brings its own
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers,
+        transport=transport,
+        http2=settings.LLM_HTTP2,
+        timeout=httpx.Timeout(
+            connect=settings.LLM_CONNECT_TIMEOUT,
+            read=settings.LLM_READ_TIMEOUT,
+            write=settings.LLM_CONNECT_TIMEOUT,
+            pool=settings.LLM_CONNECT_TIMEOUT,
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def get_http_client(provider: str, base_url: str, headers: dict | None = None) -> httpx.AsyncClient:
+    client = _clients.get(provider)
+    if client is None or client.is_closed:
+        client = build_http_client(base_url, headers)
+        _clients[provider] = client
+    return client
+
+
+async def raise_for_status(response: httpx.Response):
+    """Raise on 4xx/5xx; streamed bodies are read first so the provider's error text is kept."""
+    if response.is_success:
+        return
+    await response.aread()
+    raise httpx.HTTPStatusError(
+        f"{response.status_code} from {response.request.url}: {response.text[:500]}",
+        request=response.request,
+        response=response,
+    )
+
+
+async def warm_connection(client: httpx.AsyncClient, path: str, provider: str):
+    """
+    Make a cheap request so the TCP/TLS handshake is done and the connection sits in the
+    keep-alive pool before the first chat. A provider that's down only logs, startup goes on.
+    """
+    try:
+        response = await client.get(path)
+        await raise_for_status(response)
+    except httpx.HTTPError as e:
+        logger.warning("Warming up LLM provider %s failed: %r", provider, e)
+
+
+async def close_http_clients():
+    for client in _clients.values():
+        await client.aclose()
+    _clients.clear()
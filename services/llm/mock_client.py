@@ -0,0 +1,139 @@
+import asyncio
+import hashlib
+import random
+
+import httpx
+import orjson
+from services.llm.http_client import build_http_client
+from services.llm.openai_client import OpenAICompatibleClient
+from core.config import settings
+
+
+_WORDS = (
+    "the quick brown fox jumps over a lazy dog while streaming tokens at a steady "
+    "pace so that latency and throughput of the server can be measured offline"
+).split()
+
+
+class MockLLMClient(OpenAICompatibleClient):
+    """
+    Deterministic local provider: an in-process OpenAI-compatible endpoint behind
+    httpx.MockTransport, so load tests still go through the real client, SSE parsing
+    and JSON decoding. It waits `latency_ms` before answering, then streams
+    `response_tokens` words at `tokens_per_sec`. The text is seeded from the prompt, so
+    the same messages always produce the same reply. `error_rate` answers that share
+    of calls with a 500, for exercising failover.
+    """
+    provider = "mock"
+    model = "mock"
+    base_url = "http://mock.local/v1"
+
+    def __init__(
+        self,
+        tokens_per_sec: float | None = None,
+        latency_ms: float | None = None,
+        response_tokens: int | None = None,
+        model: str | None = None,
+        error_rate: float | None = None,
+        provider: str | None = None,
+    ):
+        self.tokens_per_sec = tokens_per_sec or settings.MOCK_TOKENS_PER_SEC
+        self.latency_ms = settings.MOCK_LATENCY_MS if latency_ms is None else latency_ms
+        self.response_tokens = response_tokens or settings.MOCK_RESPONSE_TOKENS
+        self.error_rate = settings.MOCK_ERROR_RATE if error_rate is None else error_rate
+        self._errors = random.Random(0)
+        self._client: httpx.AsyncClient | None = None
+        if model:
+            self.model = model
+        if provider:
+            self.provider = provider
+
+    @property
+    def api_key(self):
+        return "mock"
+
+    @property
+    def client(self):
+        # one per instance rather than the shared per-provider cache, so several mocks can share a name
+        if self._client is None or self._client.is_closed:
+            self._client = build_http_client(
+                self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                transport=httpx.MockTransport(self._handle),
+            )
+        return self._client
+
+    def _payload(self, messages, temperature, max_tokens, stream):
+        payload = super()._payload(messages, temperature, max_tokens, stream)
+        if stream:
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    def _tokens(self, messages: list[dict], max_tokens: int) -> list[str]:
+        seed = hashlib.sha256(repr(messages).encode()).digest()
+        rng = random.Random(seed)
+        count = min(self.response_tokens, max_tokens)
+        return [rng.choice(_WORDS) + " " for _ in range(count)]
+
+    def _usage(self, messages: list[dict], completion_tokens: int) -> dict:
+        prompt_tokens = sum(len(m["content"]) for m in messages) // 4
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    async def _handle(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/models"):
+            return httpx.Response(200, json={"object": "list", "data": [{"id": self.model, "object": "model"}]})
+
+        body = orjson.loads(await request.aread())
+        await asyncio.sleep(self.latency_ms / 1000)
+        if self._errors.random() < self.error_rate:
+            return httpx.Response(500, json={"error": {"message": f"{self.provider}: injected failure"}})
+
+        tokens = self._tokens(body["messages"], body["max_tokens"])
+        reason = "stop" if len(tokens) < body["max_tokens"] else "length"
+        usage = self._usage(body["messages"], len(tokens))
+        if not body.get("stream"):
+            return httpx.Response(200, json={
+                "object": "chat.completion",
+                "model": self.model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                    "finish_reason": reason,
+                }],
+                "usage": usage,
+            })
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage")
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream"},
+            content=self._sse(tokens, reason, usage if include_usage else None),
+        )
+
+    def _chunk(self, delta: dict, finish_reason=None, usage=None) -> bytes:
+        data = {
+            "object": "chat.completion.chunk",
+            "model": self.model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if usage is None else [],
+        }
+        if usage is not None:
+            data["usage"] = usage
+        return b"data: " + orjson.dumps(data) + b"\n\n"
+
+    async def _sse(self, tokens: list[str], reason: str, usage: dict | None):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for i, token in enumerate(tokens):
+            # pace against the clock so slow consumers don't drift the rate
+            delay = start + i / self.tokens_per_sec - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield self._chunk({"content": token})
+        yield self._chunk({}, finish_reason=reason)
+        if usage is not None:
+            yield self._chunk({}, usage=usage)
+        yield b"data: [DONE]\n\n"
@@ -1,8 +1,102 @@
-import httpx
-from services.llm.base import BaseLLMClient
+from abc import abstractmethod
+
+import orjson
+from services.llm.base import BaseLLMClient, TextDelta, Usage, Finish
+from services.llm.http_client import get_http_client, raise_for_status, warm_connection
 from core.config import settings
+from utils.sse import iter_sse_data
+
+
+class OpenAICompatibleClient(BaseLLMClient):
+    """Chat completions over the OpenAI wire format, which Groq also speaks."""
+
+    base_url: str
+
+    @property
+    @abstractmethod
+    def api_key(self) -> str | None:
+        ...
+
+    @property
+    def client(self):
+        return get_http_client(
+            self.provider,
+            base_url=self.base_url,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+        )
+
+    async def warmup(self):
+        await warm_connection(self.client, "/models", self.provider)
+
+    def _payload(self, messages, temperature, max_tokens, stream):
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": stream
+        }
 
+    @staticmethod
+    def _parse_chunk(data: dict):
+        choices = data.get("choices") or []
+        choice = choices[0] if choices else {}
+        content = (choice.get("delta") or {}).get("content")
+        if content:
+            yield TextDelta(content)
+
+        # OpenAI sends usage in a final chunk, Groq inside x_groq
+        usage = data.get("usage") or (data.get("x_groq") or {}).get("usage")
+        if usage:
+            yield Usage(
+                prompt_tokens=usage.get("prompt_tokens", 0),
+                completion_tokens=usage.get("completion_tokens", 0),
+                total_tokens=usage.get("total_tokens", 0),
+            )
+        if choice.get("finish_reason"):
+            yield Finish(reason=choice["finish_reason"], model=data.get("model"))
 
-class OpenAIClient(BaseLLMClient):
     async def stream_generate(self, messages, temperature, max_tokens):
-        pass
\ No newline at end of file
+        async with self.client.stream(
+            "POST",
+            "/chat/completions",
+            json=self._payload(messages, temperature, max_tokens, stream=True),
+        ) as response:
+            await raise_for_status(response)
+            async for payload in iter_sse_data(response.aiter_bytes()):
+                if payload == b"[DONE]":
+                    break
+                try:
+                    data = orjson.loads(payload)
+                except orjson.JSONDecodeError:
+                    continue
+                for event in self._parse_chunk(data):
+                    yield event
+
+    async def generate(self, messages, temperature=0, max_tokens=512):
+        resp = await self.client.post(
+            "/chat/completions",
+            json=self._payload(messages, temperature, max_tokens, stream=False)
+        )
+        await raise_for_status(resp)
+
+        data = orjson.loads(resp.content)
+        return data["choices"][0]["message"]["content"]
+
+
+class OpenAIClient(OpenAICompatibleClient):
+    provider = "openai"
+
+    def __init__(self):
+        self.model = settings.OPENAI_MODEL
+        self.base_url = settings.OPENAI_BASE_URL
+
+    @property
+    def api_key(self):
+        return settings.OPENAI_API_KEY
+
+    def _payload(self, messages, temperature, max_tokens, stream):
+        payload = super()._payload(messages, temperature, max_tokens, stream)
+        if stream:
+            payload["stream_options"] = {"include_usage": True}
+        return payload
@@ -0,0 +1,259 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from services.llm.base import BaseLLMClient, TextDelta
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderStats:
+    """
+    Rolling time-to-first-token and error window for one provider, plus its circuit breaker.
+    Non-streamed calls keep their own latency window: a full completion isn't a TTFT and
+    would skew ranking and the hedge delay.
+    """
+
+    def __init__(self, window: int, breaker_failures: int, breaker_cooldown: float):
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.completion_latencies: deque[float] = deque(maxlen=window)
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown = breaker_cooldown
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+    def record_success(self, latency: float, first_token: bool = True):
+        (self.latencies if first_token else self.completion_latencies).append(latency)
+        self.outcomes.append(True)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+    def record_slower_than(self, latency: float):
+        # a hedge loser never produced a token; what it took so far is a lower bound
+        self.latencies.append(latency)
+
+    def record_failure(self):
+        self.outcomes.append(False)
+        self.consecutive_failures += 1
+        # a failed trial after the cooldown re-opens the breaker immediately
+        if self.open_until or self.consecutive_failures >= self.breaker_failures:
+            self.open_until = time.monotonic() + self.breaker_cooldown
+
+    def available(self) -> bool:
+        # once the cooldown has passed, requests go through as trials until one succeeds
+        return time.monotonic() >= self.open_until
+
+    @property
+    def state(self) -> str:
+        if not self.open_until:
+            return "closed"
+        return "open" if time.monotonic() < self.open_until else "half_open"
+
+    def percentile(self, pct: float, latencies: deque[float] | None = None) -> float | None:
+        values = sorted(self.latencies if latencies is None else latencies)
+        if not values:
+            return None
+        return values[min(int(pct / 100 * len(values)), len(values) - 1)]
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def score(self) -> tuple[float, float]:
+        # errors rank first, in 10% bands, so a provider that only ever fails (and so has
+        # no latency) goes last; within a band the faster one wins, and unmeasured
+        # providers score 0 so they get tried and measured
+        return round(self.error_rate, 1), self.percentile(50) or 0.0
+
+
+_END = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class _Attempt:
+    """One provider stream pumped into a queue so attempts can race on their first event."""
+
+    def __init__(self, client: BaseLLMClient, messages, temperature, max_tokens):
+        self.client = client
+        self.started = time.monotonic()
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._pump(messages, temperature, max_tokens))
+
+    async def _pump(self, messages, temperature, max_tokens):
+        # nothing is queued before the first text: a stream that ends without any
+        # (error bodies, empty completions) is a failure, not a fast win
+        held = []
+        try:
+            async for event in self.client.stream_generate(messages, temperature=temperature, max_tokens=max_tokens):
+                if held is not None and not isinstance(event, TextDelta):
+                    held.append(event)
+                    continue
+                if held is not None:
+                    for early in held:
+                        await self.queue.put(early)
+                    held = None
+                await self.queue.put(event)
+            if held is not None:
+                raise RuntimeError(f"{self.client.provider} stream ended without any text")
+            await self.queue.put(_END)
+        except Exception as e:
+            await self.queue.put(_Failure(e))
+
+    def cancel(self):
+        self.task.cancel()
+
+
+class LLMRouter(BaseLLMClient):
+    """
+    Routes each call to the healthy provider with the best rolling time-to-first-token.
+    Errors before the first token fail over to the next provider; a provider that keeps
+    failing has its circuit breaker opened for a cooldown. With hedging on, a stream that
+    hasn't produced its first token after the primary's p95 starts the next provider too,
+    and whichever streams first wins.
+    """
+    provider = "router"
+
+    def __init__(
+        self,
+        clients: list[BaseLLMClient],
+        hedge: bool = False,
+        hedge_percentile: float = 95,
+        hedge_min_delay: float = 0.1,
+        hedge_max_delay: float = 2.0,
+        window: int = 50,
+        breaker_failures: int = 3,
+        breaker_cooldown: float = 30,
+    ):
+        if not clients:
+            raise ValueError("LLMRouter needs at least one provider")
+        self.clients = clients
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self.stats_by_provider = {
+            client.provider: ProviderStats(window, breaker_failures, breaker_cooldown)
+            for client in clients
+        }
+
+    @property
+    def model(self) -> str:
+        ranked = self._ranked()
+        return (ranked[0] if ranked else self.clients[0]).model
+
+    def _ranked(self) -> list[BaseLLMClient]:
+        available = [c for c in self.clients if self.stats_by_provider[c.provider].available()]
+        return sorted(available, key=lambda c: self.stats_by_provider[c.provider].score())
+
+    def _hedge_delay(self, client: BaseLLMClient) -> float:
+        p = self.stats_by_provider[client.provider].percentile(self.hedge_percentile)
+        if p is None:
+            return self.hedge_max_delay
+        return min(max(p, self.hedge_min_delay), self.hedge_max_delay)
+
+    async def warmup(self):
+        await asyncio.gather(*(client.warmup() for client in self.clients))
+
+    async def generate(self, messages, temperature=0, max_tokens=512):
+        last_error = None
+        for client in self._ranked():
+            stats = self.stats_by_provider[client.provider]
+            started = time.monotonic()
+            try:
+                result = await client.generate(messages, temperature=temperature, max_tokens=max_tokens)
+            except Exception as e:
+                logger.warning("LLM provider %s failed: %r", client.provider, e)
+                stats.record_failure()
+                last_error = e
+                continue
+            stats.record_success(time.monotonic() - started, first_token=False)
+            return result
+        raise last_error or RuntimeError("No healthy LLM provider")
+
+    async def stream_generate(self, messages, temperature, max_tokens):
+        remaining = self._ranked()
+        if not remaining:
+            raise RuntimeError("No healthy LLM provider")
+
+        waiters: dict[asyncio.Task, _Attempt] = {}
+        attempts: list[_Attempt] = []
+        winner, first = None, None
+        last_error = None
+
+        def launch():
+            attempt = _Attempt(remaining.pop(0), messages, temperature, max_tokens)
+            attempts.append(attempt)
+            waiters[asyncio.create_task(attempt.queue.get())] = attempt
+
+        try:
+            launch()
+            while winner is None:
+                timeout = None
+                if self.hedge and remaining and len(waiters) == 1:
+                    primary = next(iter(waiters.values()))
+                    timeout = max(self._hedge_delay(primary.client) - (time.monotonic() - primary.started), 0)
+
+                done, _ = await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch()
+                    continue
+
+                for waiter in done:
+                    attempt = waiters.pop(waiter)
+                    item = waiter.result()
+                    stats = self.stats_by_provider[attempt.client.provider]
+                    if isinstance(item, _Failure):
+                        logger.warning("LLM provider %s failed: %r", attempt.client.provider, item.error)
+                        stats.record_failure()
+                        last_error = item.error
+                    elif winner is None:
+                        stats.record_success(time.monotonic() - attempt.started)
+                        winner, first = attempt, item
+
+                if winner is None and not waiters:
+                    if not remaining:
+                        raise last_error
+                    launch()
+
+            for waiter, attempt in waiters.items():
+                waiter.cancel()
+                attempt.cancel()
+                self.stats_by_provider[attempt.client.provider].record_slower_than(time.monotonic() - attempt.started)
+
+            item = first
+            while item is not _END:
+                if isinstance(item, _Failure):
+                    # already streaming to the client, too late to fail over
+                    self.stats_by_provider[winner.client.provider].record_failure()
+                    raise item.error
+                yield item
+                item = await winner.queue.get()
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+            for attempt in attempts:
+                attempt.cancel()
+
+    def stats(self) -> dict:
+        return {
+            provider: {
+                "state": stats.state,
+                "p50_ttft_ms": round(stats.percentile(50) * 1000, 1) if stats.latencies else None,
+                "p95_ttft_ms": round(stats.percentile(95) * 1000, 1) if stats.latencies else None,
+                "p50_generate_ms": (
+                    round(stats.percentile(50, stats.completion_latencies) * 1000, 1)
+                    if stats.completion_latencies else None
+                ),
+                "error_rate": round(stats.error_rate, 4),
+            }
+            for provider, stats in self.stats_by_provider.items()
+        }
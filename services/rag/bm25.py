@@ -0,0 +1,198 @@
+import asyncio
+import json
+import math
+import os
+import re
+import shutil
+import threading
+from collections import Counter, defaultdict
+
+from cachetools import LRUCache
+from services.rag.vector_store import SearchHit
+
+
+# keeps identifiers like "AB-1234", "4.2.1" or "x_max" in one token, so exact-term questions match them
+_TOKEN = re.compile(r"\w+(?:[-./]\w+)*")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Per-document inverted index next to the vector store, laid out like
+    NumpyVectorStore: a directory of JSON shards, one per upserted batch until
+    finalize() merges them. A shard holds its chunk texts, their token counts and
+    postings {term: [[row, tf], ...]}. Chunk ids match the vector store's
+    `{document_id}_{index}`, so hits from both can be fused.
+    """
+
+    def __init__(self, root: str, k1: float = 1.5, b: float = 0.75, cache_size: int = 256):
+        self.root = root
+        self.k1 = k1
+        self.b = b
+        os.makedirs(root, exist_ok=True)
+        # document_id -> (directory mtime, shards)
+        self._cache = LRUCache(maxsize=cache_size)
+        self._lock = threading.Lock()
+
+    def _dir(self, document_id: str) -> str:
+        return os.path.join(self.root, document_id)
+
+    @staticmethod
+    def _shard_path(directory: str, start: int) -> str:
+        return os.path.join(directory, f"{start:08d}.json")
+
+    @staticmethod
+    def _shard_starts(directory: str) -> list[int]:
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        return sorted(int(name[:-5]) for name in names if name.endswith(".json") and name[:-5].isdigit())
+
+    @staticmethod
+    def _build_shard(texts: list[str]) -> dict:
+        lengths, postings = [], defaultdict(list)
+        for row, text in enumerate(texts):
+            terms = tokenize(text)
+            lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                postings[term].append([row, tf])
+        return {"texts": list(texts), "lengths": lengths, "postings": postings}
+
+    def _write_shard(self, directory: str, start: int, shard: dict):
+        path = self._shard_path(directory, start)
+        with open(path + ".tmp", "w") as f:
+            json.dump(shard, f)
+        os.replace(path + ".tmp", path)
+
+    def _load(self, document_id: str) -> list[tuple[int, dict]]:
+        directory = self._dir(document_id)
+        try:
+            version = os.stat(directory).st_mtime_ns
+        except FileNotFoundError:
+            return []
+
+        with self._lock:
+            cached = self._cache.get(document_id)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        shards, covered = [], 0
+        for start in self._shard_starts(directory):
+            if start < covered:
+                # left behind by an interrupted merge or rewrite
+                continue
+            with open(self._shard_path(directory, start)) as f:
+                shard = json.load(f)
+            shards.append((start, shard))
+            covered = start + len(shard["texts"])
+
+        with self._lock:
+            self._cache[document_id] = (version, shards)
+        return shards
+
+    def _invalidate(self, document_id: str):
+        with self._lock:
+            self._cache.pop(document_id, None)
+
+    def _upsert(self, document_id, start_index, texts):
+        directory = self._dir(document_id)
+        os.makedirs(directory, exist_ok=True)
+
+        # positional like the vector store: writing at start_index replaces everything from there on
+        for start, shard in self._load(document_id):
+            if start >= start_index:
+                os.remove(self._shard_path(directory, start))
+            elif start + len(shard["texts"]) > start_index:
+                self._write_shard(directory, start, self._build_shard(shard["texts"][:start_index - start]))
+
+        self._write_shard(directory, start_index, self._build_shard(texts))
+        self._invalidate(document_id)
+
+    def _finalize(self, document_id):
+        shards = self._load(document_id)
+        if len(shards) <= 1:
+            return
+        directory = self._dir(document_id)
+        texts = [text for _, shard in shards for text in shard["texts"]]
+        self._write_shard(directory, 0, self._build_shard(texts))
+        for start, _ in shards[1:]:
+            os.remove(self._shard_path(directory, start))
+        self._invalidate(document_id)
+
+    def _query(self, query, document_ids, top_k):
+        terms = set(tokenize(query))
+        if document_ids is None:
+            document_ids = os.listdir(self.root)
+        loaded = [(document_id, start, shard) for document_id in document_ids for start, shard in self._load(document_id)]
+
+        # the requested documents together are the collection idf and average length are taken over
+        total = sum(len(shard["lengths"]) for _, _, shard in loaded)
+        if not terms or not total:
+            return []
+        avg_length = sum(sum(shard["lengths"]) for _, _, shard in loaded) / total
+        frequency = Counter()
+        for _, _, shard in loaded:
+            for term in terms:
+                frequency[term] += len(shard["postings"].get(term, ()))
+
+        scores = defaultdict(float)
+        for shard_index, (_, _, shard) in enumerate(loaded):
+            lengths = shard["lengths"]
+            for term in terms:
+                postings = shard["postings"].get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (total - frequency[term] + 0.5) / (frequency[term] + 0.5))
+                for row, tf in postings:
+                    norm = self.k1 * (1 - self.b + self.b * lengths[row] / max(avg_length, 1e-9))
+                    scores[shard_index, row] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        hits = []
+        for (shard_index, row), score in sorted(scores.items(), key=lambda item: -item[1])[:top_k]:
+            document_id, start, shard = loaded[shard_index]
+            hits.append(SearchHit(
+                id=f"{document_id}_{start + row}",
+                document_id=document_id,
+                text=shard["texts"][row],
+                score=score,
+            ))
+        return hits
+
+    def _delete(self, document_id):
+        shutil.rmtree(self._dir(document_id), ignore_errors=True)
+        self._invalidate(document_id)
+
+    def _count(self, document_id):
+        return sum(len(shard["texts"]) for _, shard in self._load(document_id))
+
+    async def upsert(self, document_id: str, start_index: int, texts: list[str]):
+        await asyncio.to_thread(self._upsert, document_id, start_index, texts)
+
+    async def finalize(self, document_id: str):
+        await asyncio.to_thread(self._finalize, document_id)
+
+    async def query(self, query: str, document_ids: list[str] | None, top_k: int) -> list[SearchHit]:
+        return await asyncio.to_thread(self._query, query, document_ids, top_k)
+
+    async def delete(self, document_id: str):
+        await asyncio.to_thread(self._delete, document_id)
+
+    async def count(self, document_id: str) -> int:
+        return await asyncio.to_thread(self._count, document_id)
+
+
+def reciprocal_rank_fusion(rankings: list[list[SearchHit]], k: int = 60) -> list[SearchHit]:
+    """Merges ranked lists by chunk id; a hit scores sum(1 / (k + rank)) over the lists it appears in."""
+    scores, hits = defaultdict(float), {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, start=1):
+            scores[hit.id] += 1 / (k + rank)
+            hits.setdefault(hit.id, hit)
+    return [
+        SearchHit(id=hit_id, document_id=hits[hit_id].document_id, text=hits[hit_id].text, score=score)
+        for hit_id, score in sorted(scores.items(), key=lambda item: -item[1])
+    ]
@@ -0,0 +1,199 @@
+import hashlib
+import itertools
+import logging
+import re
+from collections import Counter
+
+import orjson
+from cachetools import TTLCache
+from core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class MemoryCacheBackend:
+    """
+    Per-process LRU cache with TTL expiry. Version bumps only reach this process, so it
+    can't be invalidated by an ingest worker running elsewhere; use Redis for that.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        # a version is only kept until every entry cached under an older one has expired
+        # (twice the TTL, for results computed around the bump). Versions come from one
+        # counter, so a name that expires back to 0 and is bumped again never gets a number
+        # it had before, and the dict stays bounded by the bumps made in that window.
+        self._versions = TTLCache(maxsize=float("inf"), ttl=2 * ttl)
+        self._clock = itertools.count(1)
+
+    async def get(self, key: str):
+        return self._entries.get(key)
+
+    async def set(self, key: str, value):
+        self._entries[key] = value
+
+    async def get_versions(self, names: list[str]) -> list[int]:
+        return [self._versions.get(name, 0) for name in names]
+
+    async def bump_versions(self, names: list[str]):
+        for name in names:
+            self._versions[name] = next(self._clock)
+
+
+def memory_versions_reach_api(setting: str) -> bool:
+    """
+    Whether a memory backend would see the invalidations it depends on: documents are
+    re-ingested and deleted by the ingest worker, which only shares memory with the API
+    when it runs embedded.
+    """
+    if settings.INGEST_EMBEDDED_WORKER:
+        return True
+    logger.warning(
+        "%s=memory with an out-of-process ingest worker: its invalidations would not reach "
+        "this process, so caching results that depend on documents is off. Use redis instead.",
+        setting,
+    )
+    return False
+
+
+class RedisCacheBackend:
+    """Shared across workers; eviction past the TTL is left to the server's maxmemory-policy (allkeys-lru)."""
+
+    def __init__(self, url: str, ttl: int, prefix: str = "rag"):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._ttl = ttl
+        self._prefix = prefix
+
+    async def get(self, key: str):
+        raw = await self._redis.get(f"{self._prefix}:{key}")
+        return orjson.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value):
+        await self._redis.set(f"{self._prefix}:{key}", orjson.dumps(value), ex=self._ttl)
+
+    async def get_versions(self, names: list[str]) -> list[int]:
+        if not names:
+            return []
+        raw = await self._redis.mget([f"{self._prefix}:version:{name}" for name in names])
+        return [int(v) if v is not None else 0 for v in raw]
+
+    async def bump_versions(self, names: list[str]):
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for name in names:
+                pipe.incr(f"{self._prefix}:version:{name}")
+            await pipe.execute()
+
+
+class RAGCache:
+    """
+    Query-embedding cache keyed on the normalized query text and retrieval-result
+    cache keyed on (query hash, sorted document ids, top_k). Each document carries a
+    version that is part of the retrieval key, so bumping it on re-ingest or delete
+    invalidates every cached result that touched the document.
+    """
+
+    def __init__(self, embedding_backend, retrieval_backend):
+        self._embeddings = embedding_backend
+        self._retrievals = retrieval_backend
+        self._stats = Counter()
+
+    async def _get(self, backend, name: str, key: str):
+        try:
+            value = await backend.get(key)
+        except Exception:
+            logger.exception("RAG cache read failed")
+            value = None
+        self._stats[f"{name}_hits" if value is not None else f"{name}_misses"] += 1
+        return value
+
+    async def _set(self, backend, key: str, value):
+        try:
+            await backend.set(key, value)
+        except Exception:
+            logger.exception("RAG cache write failed")
+
+    async def get_embedding(self, query: str):
+        return await self._get(self._embeddings, "embedding", f"emb:{_hash(normalize_query(query))}")
+
+    async def set_embedding(self, query: str, embedding: list[float]):
+        await self._set(self._embeddings, f"emb:{_hash(normalize_query(query))}", embedding)
+
+    async def retrieval_key(self, query: str, document_ids: list[str], top_k: int, mode: str = "dense") -> str | None:
+        document_ids = sorted(set(document_ids))
+        try:
+            versions = await self._retrievals.get_versions(document_ids)
+        except Exception:
+            logger.exception("RAG cache version lookup failed")
+            return None
+        scope = ",".join(f"{doc_id}@{version}" for doc_id, version in zip(document_ids, versions))
+        return f"ret:{_hash(normalize_query(query))}:{_hash(scope)}:{top_k}:{mode}"
+
+    async def get_retrieval(self, key: str | None):
+        if key is None:
+            return None
+        return await self._get(self._retrievals, "retrieval", key)
+
+    async def set_retrieval(self, key: str | None, chunks: list[str]):
+        if key is not None:
+            await self._set(self._retrievals, key, chunks)
+
+    async def invalidate_documents(self, document_ids: list[str]):
+        try:
+            await self._retrievals.bump_versions(list(document_ids))
+        except Exception:
+            logger.exception("RAG cache invalidation failed")
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        for name in ("embedding", "retrieval"):
+            hits, misses = stats.get(f"{name}_hits", 0), stats.get(f"{name}_misses", 0)
+            stats[f"{name}_hit_rate"] = round(hits / (hits + misses), 4) if hits + misses else None
+        return stats
+
+
+class _NullBackend:
+
+    async def get(self, key):
+        return None
+
+    async def set(self, key, value):
+        pass
+
+    async def get_versions(self, names):
+        return [0] * len(names)
+
+    async def bump_versions(self, names):
+        pass
+
+
+def _build_cache() -> RAGCache:
+    if settings.RAG_CACHE_BACKEND == "redis":
+        backend = RedisCacheBackend(settings.REDIS_URL, ttl=settings.RAG_CACHE_TTL)
+        return RAGCache(backend, backend)
+    if settings.RAG_CACHE_BACKEND == "memory":
+        # query embeddings don't depend on documents and can stay per process either way
+        retrievals = (
+            MemoryCacheBackend(settings.RAG_RETRIEVAL_CACHE_SIZE, settings.RAG_CACHE_TTL)
+            if memory_versions_reach_api("RAG_CACHE_BACKEND") else _NullBackend()
+        )
+        return RAGCache(
+            MemoryCacheBackend(settings.RAG_EMBEDDING_CACHE_SIZE, settings.RAG_CACHE_TTL),
+            retrievals,
+        )
+    return RAGCache(_NullBackend(), _NullBackend())
+
+
+rag_cache = _build_cache()
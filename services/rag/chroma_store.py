@@ -0,0 +1,52 @@
+import asyncio
+from services.rag.vector_store import SearchHit, VectorStore
+
+
+class ChromaVectorStore(VectorStore):
+
+    def __init__(self):
+        from db.chroma_client import collection
+        self.collection = collection
+
+    async def upsert(self, document_id, start_index, embeddings, texts):
+        await asyncio.to_thread(
+            self.collection.upsert,
+            ids=[f"{document_id}_{idx}" for idx in range(start_index, start_index + len(texts))],
+            embeddings=embeddings,
+            documents=texts,
+            metadatas=[{"document_id": document_id}] * len(texts)
+        )
+
+    async def query(self, embedding, document_ids, top_k):
+        where_filter = None
+        if document_ids:
+            where_filter = {"document_id": {"$in": document_ids}}
+
+        results = await asyncio.to_thread(
+            self.collection.query,
+            query_embeddings=[embedding],
+            n_results=top_k,
+            where=where_filter
+        )
+        if not results["ids"]:
+            return []
+        return [
+            SearchHit(id=chunk_id, document_id=meta["document_id"], text=text, score=-distance)
+            for chunk_id, meta, text, distance in zip(
+                results["ids"][0], results["metadatas"][0], results["documents"][0], results["distances"][0]
+            )
+        ]
+
+    async def delete(self, document_id):
+        await asyncio.to_thread(self.collection.delete, where={"document_id": document_id})
+
+    async def count(self, document_id):
+        result = await asyncio.to_thread(self.collection.get, where={"document_id": document_id}, include=[])
+        return len(result["ids"])
+
+    async def get_chunks(self, document_id):
+        result = await asyncio.to_thread(
+            self.collection.get, where={"document_id": document_id}, include=["documents"]
+        )
+        ordered = sorted(zip(result["ids"], result["documents"]), key=lambda r: int(r[0].rsplit("_", 1)[1]))
+        return [text for _, text in ordered]
@@ -0,0 +1,265 @@
+import hashlib
+import re
+from dataclasses import dataclass
+
+from core.config import settings
+
+
+class _PageTracker:
+    """Maps global offsets in the concatenated page text back to (page, offset) resume points."""
+
+    def __init__(self):
+        self.length = 0
+        # (page_number, global offset of the page's first character) for pages still buffered
+        self.pages: list[tuple[int, int]] = []
+
+    def add(self, page_number: int, text: str, skip: int) -> str:
+        self.pages.append((page_number, self.length - skip))
+        text = text[skip:]
+        self.length += len(text)
+        return text
+
+    def drop_before(self, offset: int):
+        while len(self.pages) > 1 and self.pages[1][1] <= offset:
+            self.pages.pop(0)
+
+    def position(self, offset: int) -> dict:
+        page_number, page_start = self.pages[0]
+        for number, start in self.pages:
+            if start > offset:
+                break
+            page_number, page_start = number, start
+        return {"page": page_number, "offset": offset - page_start}
+
+
+class FixedWindowChunker:
+    """
+    Fixed-size overlapping character windows over a stream of pages. Only the
+    unconsumed tail of the text is buffered, and every chunk comes with the
+    (page, offset) where the next chunk starts so ingestion can resume from there.
+    """
+    name = "fixed"
+
+    def __init__(self, chunk_size: int = 500, overlap: int = 50):
+        self.chunk_size = chunk_size
+        self.step = chunk_size - overlap
+        self._buffer = ""
+        self._buffer_start = 0
+        self._pages = _PageTracker()
+
+    def _emit(self):
+        chunk = self._buffer[:self.chunk_size].strip()
+        self._buffer = self._buffer[self.step:]
+        self._buffer_start += self.step
+        self._pages.drop_before(self._buffer_start)
+        return chunk, self._pages.position(self._buffer_start)
+
+    def feed(self, page_number: int, text: str, skip: int = 0):
+        self._buffer += self._pages.add(page_number, text, skip)
+        while len(self._buffer) >= self.chunk_size:
+            chunk, resume = self._emit()
+            if chunk:
+                yield chunk, resume
+
+    def finish(self):
+        while self._buffer:
+            chunk, resume = self._emit()
+            if chunk:
+                yield chunk, resume
+
+
+# end of a sentence, or a blank line between paragraphs
+_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+_WORD = re.compile(r"\S+")
+
+
+@dataclass
+class _Segment:
+    start: int  # global offset
+    text: str
+    tokens: int
+    paragraph: bool  # starts a new paragraph
+
+
+class TokenChunker:
+    """
+    Packs whole sentences into chunks of at most `max_tokens` as counted by the
+    embedding model's tokenizer, preferring to break at paragraphs once a chunk is
+    half full. Consecutive chunks share up to `overlap_tokens` of trailing sentences,
+    and a sentence longer than a chunk is split between words. The resume point of
+    each chunk is the first sentence of the next one, so resuming from it
+    reproduces the same chunks.
+    """
+    name = "token"
+
+    def __init__(self, tokenizer, max_tokens: int = 250, overlap_tokens: int = 32):
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self._tail = ""
+        self._tail_start = 0
+        self._paragraph = True
+        self._current: list[_Segment] = []
+        self._current_tokens = 0
+        self._pages = _PageTracker()
+
+    def _split_long(self, segment: _Segment):
+        # greedy by words; the rest becomes one piece as soon as it fits, which keeps the
+        # split identical when a resumed run starts from one of the pieces
+        text = segment.text
+        words = list(_WORD.finditer(text))
+        i, first = 0, True
+        while i < len(words):
+            start = words[i].start()
+            rest = text[start:]
+            rest_tokens = self.tokenizer.count(rest)
+            if rest_tokens <= self.max_tokens:
+                yield _Segment(segment.start + start, rest, rest_tokens, segment.paragraph and first)
+                return
+
+            # binary search for the most words that fit, always taking at least one
+            lo, hi = i + 1, len(words) - 1
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if self.tokenizer.count(text[start:words[mid - 1].end()]) <= self.max_tokens:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            piece = text[start:words[lo - 1].end()]
+            yield _Segment(segment.start + start, piece, self.tokenizer.count(piece), segment.paragraph and first)
+            i, first = lo, False
+
+    def _emit(self, next_start: int, next_tokens: int = 0):
+        text = ""
+        for segment in self._current:
+            if text:
+                text += "\n\n" if segment.paragraph else " "
+            text += segment.text
+
+        # carry trailing sentences over as overlap, as long as the next sentence still fits
+        carried, tokens = [], 0
+        for segment in reversed(self._current):
+            if tokens + segment.tokens > min(self.overlap_tokens, self.max_tokens - next_tokens):
+                break
+            carried.insert(0, segment)
+            tokens += segment.tokens
+        self._current, self._current_tokens = carried, tokens
+
+        resume_at = carried[0].start if carried else next_start
+        self._pages.drop_before(resume_at)
+        return text, self._pages.position(resume_at)
+
+    def _add(self, segment: _Segment):
+        if segment.tokens > self.max_tokens:
+            for piece in self._split_long(segment):
+                yield from self._place(piece)
+        else:
+            yield from self._place(segment)
+
+    def _place(self, segment: _Segment):
+        if self._current and (
+            self._current_tokens + segment.tokens > self.max_tokens
+            or (segment.paragraph and self._current_tokens >= self.max_tokens // 2)
+        ):
+            yield self._emit(segment.start, segment.tokens)
+        self._current.append(segment)
+        self._current_tokens += segment.tokens
+
+    def _segment(self, text: str, start: int, paragraph: bool):
+        stripped = text.strip()
+        if stripped:
+            offset = start + (len(text) - len(text.lstrip()))
+            yield from self._add(_Segment(offset, stripped, self.tokenizer.count(stripped), paragraph))
+
+    def feed(self, page_number: int, text: str, skip: int = 0):
+        self._tail += self._pages.add(page_number, text, skip)
+        pos = 0
+        # the last piece may still grow with the next page, so it stays in the tail
+        for match in _BOUNDARY.finditer(self._tail):
+            if match.end() == len(self._tail):
+                break
+            piece = self._tail[pos:match.start()]
+            yield from self._segment(piece, self._tail_start + pos, self._paragraph)
+            self._paragraph = match.group().count("\n") >= 2
+            pos = match.end()
+        self._tail = self._tail[pos:]
+        self._tail_start += pos
+
+    def finish(self):
+        if self._tail:
+            yield from self._segment(self._tail, self._tail_start, self._paragraph)
+            self._tail_start += len(self._tail)
+            self._tail = ""
+        if self._current:
+            yield self._emit(self._tail_start)
+
+
+_NORMALIZE = re.compile(r"[\W_]+")
+
+
+def chunk_fingerprint(text: str) -> str:
+    """Equal for chunks that differ only in case, whitespace or punctuation."""
+    normalized = _NORMALIZE.sub(" ", text.lower()).strip()
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+# "page 3", "page 3 of 9", or a line that is nothing but "12" / "3 / 9" / "- 4 -"
+_PAGE_NUMBER = re.compile(r"\bpage\s*\d+(\s*(of|/)\s*\d+)?\b|^\W*\d+(\s*(of|/)\s*\d+)?\W*$")
+
+
+class RepeatedLineFilter:
+    """
+    Blanks running headers and footers: a short line among the first or last
+    `edge_lines` lines of a page whose text was already there on `min_pages` earlier
+    pages. Only page numbers are ignored when comparing, so "Clause 12" and
+    "Clause 13" stay distinct lines. Blanked lines become spaces of the same length
+    so (page, offset) resume points stay valid either way.
+    """
+
+    def __init__(self, max_chars: int = 100, edge_lines: int = 3, min_pages: int = 2, pages_by_key: dict | None = None):
+        self.max_chars = max_chars
+        self.edge_lines = edge_lines
+        self.min_pages = min_pages
+        # line key -> the first `min_pages` pages it was an edge line on
+        self._pages: dict[str, list[int]] = pages_by_key or {}
+
+    @staticmethod
+    def _key(line: str) -> str:
+        normalized = _NORMALIZE.sub(" ", _PAGE_NUMBER.sub("#", line.lower().strip())).strip()
+        return hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).hexdigest()
+
+    def __call__(self, page_number: int, text: str) -> str:
+        lines = text.split("\n")
+        filled = [i for i, line in enumerate(lines) if line.strip()]
+        for i in dict.fromkeys(filled[:self.edge_lines] + filled[-self.edge_lines:]):
+            if len(lines[i]) > self.max_chars:
+                continue
+            pages = self._pages.setdefault(self._key(lines[i]), [])
+            if sum(p < page_number for p in pages) >= self.min_pages:
+                lines[i] = " " * len(lines[i])
+            elif page_number not in pages:
+                pages.append(page_number)
+        return "\n".join(lines)
+
+    def state(self, before_page: int) -> dict:
+        """What the filter knew before `before_page`, to resume from there."""
+        state = {}
+        for key, pages in self._pages.items():
+            earlier = [p for p in pages if p < before_page]
+            if earlier:
+                state[key] = earlier
+        return state
+
+
+def get_chunker():
+    """A fresh chunker for one document, as configured by CHUNKER."""
+    if settings.CHUNKER == "fixed":
+        return FixedWindowChunker(settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
+    if settings.CHUNKER == "token":
+        from utils.tokenizer import embedding_tokenizer
+        return TokenChunker(
+            embedding_tokenizer(),
+            max_tokens=settings.CHUNK_MAX_TOKENS,
+            overlap_tokens=settings.CHUNK_OVERLAP_TOKENS,
+        )
+    raise ValueError("Unsupported CHUNKER")
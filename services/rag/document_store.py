@@ -0,0 +1,253 @@
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+
+import aiofiles
+from fastapi import HTTPException, Request
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models.document import Document
+from db.session import AsyncSessionLocal
+from services.rag.rag_service import RAGService
+
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = "uploads"
+# staging lives on the same filesystem so moving into the content store is a rename
+STAGING_DIR = os.path.join(UPLOAD_DIR, "tmp")
+os.makedirs(STAGING_DIR, exist_ok=True)
+
+
+def content_path(content_hash: str) -> str:
+    return os.path.join(UPLOAD_DIR, content_hash[:2], content_hash)
+
+
+async def lock_content(db: AsyncSession, content_hash: str):
+    """
+    Serializes uploads and garbage collection of one hash until the transaction
+    ends, so a new reference can't land between the last one going away and its
+    file and vectors being deleted.
+    """
+    await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(content_hash))))
+
+
+class StagedFile:
+    """
+    One uploaded file being copied to a staging file as its bytes arrive, hashed and
+    measured on the way; writes are buffered to `chunk_size` so memory stays at one
+    chunk however large the file is.
+    """
+
+    def __init__(self, filename: str, content_type: str | None, max_bytes: int, chunk_size: int):
+        self.filename = filename
+        self.content_type = content_type
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.path = os.path.join(STAGING_DIR, uuid.uuid4().hex)
+        self.size = 0
+        self._hasher = hashlib.sha256()
+        self._buffer = bytearray()
+        self._file = None
+
+    @property
+    def content_hash(self) -> str:
+        return self._hasher.hexdigest()
+
+    async def write(self, data: bytes):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise HTTPException(status_code=413, detail=f"{self.filename} exceeds the {self.max_bytes} byte limit")
+        self._buffer += data
+        if len(self._buffer) >= self.chunk_size:
+            await self._flush()
+
+    async def _flush(self):
+        if self._file is None:
+            self._file = await aiofiles.open(self.path, "wb")
+        chunk = bytes(self._buffer)
+        self._buffer.clear()
+        # hashlib drops the GIL on large buffers
+        await asyncio.to_thread(self._hasher.update, chunk)
+        await self._file.write(chunk)
+
+    async def close(self):
+        await self._flush()
+        await self._file.close()
+
+    async def discard(self):
+        if self._file is not None and not self._file.closed:
+            await self._file.close()
+        discard_staged(self.path)
+
+
+async def stage_multipart(
+    request: Request,
+    max_file_bytes: int,
+    chunk_size: int,
+    max_field_bytes: int = 64 * 1024,
+) -> tuple[dict[str, str], list[StagedFile]]:
+    """
+    Parses a multipart/form-data body straight off the request stream, writing each
+    file part to staging as it arrives, so an oversized file is rejected once its
+    limit is crossed rather than after the whole body was spooled. Returns the text
+    fields and the staged files; nothing is left behind on failure.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or not params.get(b"boundary"):
+        raise HTTPException(status_code=415, detail="Expected multipart/form-data")
+
+    # the parser's callbacks are synchronous, so they queue events that are handled between writes
+    events: list[tuple[str, object]] = []
+    headers: dict[bytes, bytes] = {}
+    header = [b"", b""]
+
+    def on_header_field(data, start, end):
+        header[0] += data[start:end]
+
+    def on_header_value(data, start, end):
+        header[1] += data[start:end]
+
+    def on_header_end():
+        headers[header[0].lower()] = header[1]
+        header[0], header[1] = b"", b""
+
+    def on_headers_finished():
+        events.append(("part", dict(headers)))
+        headers.clear()
+
+    callbacks = {
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": lambda data, start, end: events.append(("data", data[start:end])),
+        "on_part_end": lambda: events.append(("end", None)),
+    }
+    parser = MultipartParser(params[b"boundary"], callbacks)
+
+    fields: dict[str, str] = {}
+    files: list[StagedFile] = []
+    current: StagedFile | None = None
+    field_name, field_value = None, bytearray()
+
+    async def handle_events():
+        nonlocal current, field_name, field_value
+        for kind, payload in events:
+            if kind == "part":
+                _, options = parse_options_header(payload.get(b"content-disposition", b""))
+                name = options.get(b"name", b"").decode("latin-1")
+                if b"filename" in options:
+                    current = StagedFile(
+                        options[b"filename"].decode("utf-8", "replace"),
+                        payload.get(b"content-type", b"").decode("latin-1") or None,
+                        max_file_bytes,
+                        chunk_size,
+                    )
+                    files.append(current)
+                else:
+                    field_name, field_value = name, bytearray()
+            elif kind == "data":
+                if current is not None:
+                    await current.write(payload)
+                else:
+                    field_value += payload
+                    if len(field_value) > max_field_bytes:
+                        raise HTTPException(status_code=413, detail=f"Form field {field_name} is too large")
+            elif current is not None:
+                await current.close()
+                current = None
+            else:
+                fields[field_name] = field_value.decode("utf-8", "replace")
+                field_name = None
+        events.clear()
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            await handle_events()
+        parser.finalize()
+        await handle_events()
+        if current is not None or field_name is not None:
+            raise HTTPException(status_code=400, detail="Incomplete multipart body")
+    except MultipartParseError:
+        for staged in files:
+            await staged.discard()
+        raise HTTPException(status_code=400, detail="Malformed multipart body")
+    except BaseException:
+        for staged in files:
+            await staged.discard()
+        raise
+    return fields, files
+
+
+def discard_staged(staging_path: str):
+    _remove_file(staging_path)
+
+
+def store_content(content_hash: str, staging_path: str) -> str:
+    """Moves a staged upload into the content store; call under lock_content."""
+    path = content_path(content_hash)
+    if os.path.exists(path):
+        discard_staged(staging_path)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(staging_path, path)
+    return path
+
+
+async def find_completed(db: AsyncSession, content_hash: str) -> Document | None:
+    result = await db.execute(
+        select(Document)
+        .where(Document.content_hash == content_hash, Document.status == "COMPLETED")
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+def _remove_file(path: str | None):
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def collect_garbage(content_hash: str | None, document_id: str, storage_path: str | None):
+    """Drops the vectors and file of a deleted document once nothing references them."""
+    if content_hash is None:
+        # uploaded before hashing: the file and vectors belonged to this document alone
+        await RAGService.delete_document(document_id)
+        _remove_file(storage_path)
+        return
+
+    async with AsyncSessionLocal() as db:
+        await lock_content(db, content_hash)
+        references = await db.scalar(
+            select(func.count()).select_from(Document).where(Document.content_hash == content_hash)
+        )
+        if references:
+            return
+        await RAGService.delete_document(content_hash)
+        _remove_file(content_path(content_hash))
+        await db.commit()
+
+
+async def delete_documents(db: AsyncSession, documents: list[Document]):
+    """Delete the rows, then garbage-collect whatever they were the last reference to."""
+    released = [(doc.content_hash, doc.id, doc.storage_path) for doc in documents]
+    for doc in documents:
+        await db.delete(doc)
+    await db.commit()
+
+    for content_hash, document_id, storage_path in released:
+        try:
+            await collect_garbage(content_hash, document_id, storage_path)
+        except Exception:
+            logger.exception("Garbage collection for document %s failed", document_id)
@@ -1,8 +1,44 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 from sentence_transformers import SentenceTransformer
+from core.config import settings
 
 _embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
 
+# encode() releases the GIL inside torch, so a small thread pool keeps the
+# event loop free without loading a second copy of the model per process
+_executor = ThreadPoolExecutor(
+    max_workers=settings.EMBEDDING_WORKERS,
+    thread_name_prefix="embedding",
+)
+# chat-time queries get their own threads so they never queue behind an ingest batch
+_query_executor = ThreadPoolExecutor(
+    max_workers=settings.EMBEDDING_QUERY_WORKERS,
+    thread_name_prefix="embedding-query",
+)
+
 
 def embed_text(text: str):
     return _embedding_model.encode(text).tolist()
+
+
+def embed_texts(texts: list[str], batch_size: int | None = None):
+    if not texts:
+        return []
+    embeddings = _embedding_model.encode(
+        texts,
+        batch_size=batch_size or settings.EMBEDDING_BATCH_SIZE,
+        show_progress_bar=False,
+    )
+    return embeddings.tolist()
+
+
+async def aembed_text(text: str):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_query_executor, embed_text, text)
+
+
+async def aembed_texts(texts: list[str], batch_size: int | None = None):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, embed_texts, texts, batch_size)
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+import PyPDF2
+
+from core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class PDFExtractor(ABC):
+    """
+    Text extraction backend. Instances are pickled into the extraction processes,
+    so they should hold configuration only.
+    """
+    name: str
+
+    @abstractmethod
+    def open(self, file_path: str):
+        """Context manager yielding a parsed document handle."""
+
+    @abstractmethod
+    def page_count(self, document) -> int:
+        ...
+
+    @abstractmethod
+    def extract_page(self, document, page_number: int) -> str:
+        ...
+
+
+class PyPDF2Extractor(PDFExtractor):
+    name = "pypdf2"
+
+    @contextmanager
+    def open(self, file_path):
+        # an open file handle keeps PdfReader from loading the whole file into memory
+        with open(file_path, "rb") as f:
+            yield PyPDF2.PdfReader(f)
+
+    def page_count(self, document):
+        return len(document.pages)
+
+    def extract_page(self, document, page_number):
+        return document.pages[page_number].extract_text() or ""
+
+
+EXTRACTORS = {
+    "pypdf2": PyPDF2Extractor,
+}
+
+
+def get_extractor() -> PDFExtractor:
+    if settings.PDF_EXTRACTOR not in EXTRACTORS:
+        raise ValueError("Unsupported PDF_EXTRACTOR")
+    return EXTRACTORS[settings.PDF_EXTRACTOR]()
+
+
+class PageTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise PageTimeout()
+
+
+@contextmanager
+def _time_limit(seconds: float):
+    # SIGALRM only exists on Unix and only fires in the main thread, which is where pool workers run tasks
+    if seconds <= 0 or not hasattr(signal, "SIGALRM"):
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _page_count(extractor: PDFExtractor, file_path: str, timeout: float) -> int:
+    """Runs in an extraction process; a document that can't even be opened in time fails the job."""
+    with _time_limit(timeout):
+        with extractor.open(file_path) as document:
+            return extractor.page_count(document)
+
+
+def _extract_range(extractor: PDFExtractor, file_path: str, start: int, stop: int, page_timeout: float) -> list[str]:
+    """Runs in an extraction process; a page that times out comes back empty."""
+    texts = []
+    with extractor.open(file_path) as document:
+        for page_number in range(start, stop):
+            try:
+                with _time_limit(page_timeout):
+                    texts.append(extractor.extract_page(document, page_number))
+            except PageTimeout:
+                logger.warning("Extracting page %d of %s timed out after %ss", page_number, file_path, page_timeout)
+                texts.append("")
+    return texts
+
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that already runs torch and an event loop is not safe
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.PDF_EXTRACT_WORKERS or os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_extraction_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def _await_extraction(future: Future):
+    try:
+        return await asyncio.wrap_future(future)
+    except BrokenProcessPool:
+        # a worker died (e.g. OOM); start a fresh pool for the retry
+        shutdown_extraction_pool()
+        raise
+
+
+async def extract_pages(file_path: str, start_page: int = 0):
+    """
+    Yields (page_number, pages_total, text) in page order. Ranges of
+    PDF_PAGES_PER_TASK pages are extracted across the process pool, with at most
+    PDF_EXTRACT_WINDOW ranges in flight per document so memory stays bounded.
+    """
+    extractor = get_extractor()
+    # opening a PDF parses its whole xref, so that happens in the pool too
+    pages_total = await _await_extraction(
+        _get_pool().submit(_page_count, extractor, file_path, settings.PDF_PAGE_TIMEOUT_SECONDS)
+    )
+    per_task = settings.PDF_PAGES_PER_TASK
+    window = settings.PDF_EXTRACT_WINDOW or 2 * (settings.PDF_EXTRACT_WORKERS or os.cpu_count())
+    starts = iter(range(start_page, pages_total, per_task))
+    pending: deque[tuple[int, Future]] = deque()
+
+    def submit():
+        start = next(starts, None)
+        if start is not None:
+            future = _get_pool().submit(
+                _extract_range, extractor, file_path, start, min(start + per_task, pages_total),
+                settings.PDF_PAGE_TIMEOUT_SECONDS,
+            )
+            pending.append((start, future))
+
+    try:
+        for _ in range(window):
+            submit()
+        while pending:
+            start, future = pending.popleft()
+            texts = await _await_extraction(future)
+            submit()
+            for offset, text in enumerate(texts):
+                yield start + offset, pages_total, text
+    finally:
+        for _, future in pending:
+            future.cancel()
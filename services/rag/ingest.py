@@ -0,0 +1,169 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from db.models.document import Document
+from services.rag.chunker import RepeatedLineFilter, chunk_fingerprint, get_chunker
+from services.rag.document_store import find_completed
+from services.rag.extractors import extract_pages
+from services.rag.rag_service import RAGService
+from services.rag.summarizer import summarize_document
+
+
+logger = logging.getLogger(__name__)
+
+
+def _chunk_page(chunker, line_filter, page_number: int, text: str, skip: int):
+    # chunking tokenizes, so it runs off the event loop
+    if line_filter:
+        text = line_filter(page_number, text)
+    return list(chunker.feed(page_number, text, skip=skip))
+
+
+async def _get_document(db: AsyncSession, document_id: str):
+    result = await db.execute(
+        select(Document).where(Document.id == document_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def _share_result(db: AsyncSession, doc: Document):
+    """Completes every other document with the same content, they all read the same vectors."""
+    await db.execute(
+        update(Document)
+        .where(Document.content_hash == doc.content_hash, Document.id != doc.id)
+        .values(status="COMPLETED", meta_data=doc.meta_data, error_message=None)
+    )
+    await db.commit()
+
+
+async def process_document(document_id: str, file_path: str, db: AsyncSession):
+    """
+    Chunk and embed a claimed document; failures propagate to the ingest queue.
+    Pages are extracted (in parallel, see extractors.py), chunked, embedded and upserted in bounded batches, and
+    a checkpoint is committed to meta_data after every batch so a crashed run
+    resumes from the last committed batch. Running headers and footers are blanked
+    once they have repeated at the page edges, and chunks that repeat an earlier one
+    up to case, whitespace and punctuation are skipped; both carry over a resume, so
+    it produces the same chunks as an uninterrupted run.
+    """
+    doc = await _get_document(db, document_id)
+    if not doc:
+        return
+
+    if doc.content_hash:
+        existing = await find_completed(db, doc.content_hash)
+        if existing:
+            doc.status = "COMPLETED"
+            doc.meta_data = dict(existing.meta_data or {})
+            await db.commit()
+            return
+
+    key = doc.vector_key
+    chunker = get_chunker()
+    checkpoint = (doc.meta_data or {}).get("ingest")
+    # resume points are only meaningful to the chunker that produced them
+    if checkpoint and checkpoint.get("chunker", "fixed") == chunker.name:
+        filter_state = checkpoint.get("line_filter")
+        resume = checkpoint["resume"]
+        chunks_done = checkpoint["chunks_done"]
+        pages_total = checkpoint["pages_total"]
+        duplicates = checkpoint.get("duplicates", 0)
+    else:
+        filter_state = None
+        resume = {"page": 0, "offset": 0}
+        chunks_done = 0
+        pages_total = 0
+        duplicates = 0
+        await RAGService.delete_document(key)
+
+    seen: set[str] = set()
+    line_filter = None
+    if settings.CHUNK_DEDUP:
+        line_filter = RepeatedLineFilter(pages_by_key=filter_state)
+        # the chunks stored so far are exactly the distinct ones seen so far
+        if chunks_done:
+            stored = await RAGService.get_chunks(key)
+            seen = {chunk_fingerprint(chunk) for chunk in stored[:chunks_done]}
+    pages = extract_pages(file_path, start_page=resume["page"])
+    batch: list[str] = []
+    pages_done = resume["page"]
+
+    async def flush(next_resume: dict):
+        nonlocal batch, chunks_done
+        if batch:
+            await RAGService.upsert_chunks(key, batch, start_index=chunks_done)
+            chunks_done += len(batch)
+            batch = []
+        doc.meta_data = {
+            **(doc.meta_data or {}),
+            "ingest": {
+                "chunker": chunker.name,
+                "pages_total": pages_total,
+                "pages_done": pages_done,
+                "chunks_done": chunks_done,
+                "duplicates": duplicates,
+                "resume": next_resume,
+                "line_filter": line_filter.state(next_resume["page"]) if line_filter else None,
+            },
+        }
+        # every checkpoint also renews the queue lease
+        doc.locked_at = datetime.now(timezone.utc)
+        await db.commit()
+
+    async def add(chunks):
+        nonlocal duplicates
+        for chunk, next_resume in chunks:
+            if settings.CHUNK_DEDUP:
+                fingerprint = chunk_fingerprint(chunk)
+                if fingerprint in seen:
+                    duplicates += 1
+                    continue
+                seen.add(fingerprint)
+            batch.append(chunk)
+            if len(batch) >= settings.VECTOR_WRITE_BATCH_SIZE:
+                await flush(next_resume)
+
+    try:
+        skip = resume["offset"]
+        async for page_number, pages_total, text in pages:
+            chunks = await asyncio.to_thread(_chunk_page, chunker, line_filter, page_number, text, skip)
+            await add(chunks)
+            skip = 0
+            pages_done = page_number + 1
+
+        await add(list(chunker.finish()))
+        if batch:
+            await RAGService.upsert_chunks(key, batch, start_index=chunks_done)
+            chunks_done += len(batch)
+    finally:
+        await pages.aclose()
+
+    await RAGService.finalize_document(key)
+
+    doc.status = "COMPLETED"
+    doc.meta_data = {
+        "chunks_count": chunks_done,
+        "duplicate_chunks": duplicates,
+        "chunker": chunker.name,
+        "pages_total": pages_total,
+        "pages_done": pages_done,
+    }
+    await db.commit()
+    if doc.content_hash:
+        await _share_result(db, doc)
+
+    # the document is already usable; without a summary, summary requests fall back to retrieval
+    if settings.DOCUMENT_SUMMARY_ON_INGEST:
+        try:
+            summary = await summarize_document(key)
+        except Exception:
+            logger.exception("Summarizing document %s failed", document_id)
+            return
+        doc.meta_data = {**doc.meta_data, "summary": summary}
+        await db.commit()
+        if doc.content_hash:
+            await _share_result(db, doc)
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update, or_, and_, exists
+from sqlalchemy.orm import aliased
+
+from core.config import settings
+from db.session import AsyncSessionLocal
+from db.models.document import Document
+from services.rag.document_store import collect_garbage
+from services.rag.extractors import shutdown_extraction_pool
+from services.rag.ingest import process_document
+from services.rag.rag_service import RAGService
+
+
+logger = logging.getLogger(__name__)
+
+# lets the API process wake its embedded worker as soon as an upload is committed
+_wakeup = asyncio.Event()
+
+
+def notify_ingest_queue():
+    _wakeup.set()
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+async def claim_documents(worker_id: str, limit: int) -> list[tuple[str, str, str | None]]:
+    """
+    Lock up to `limit` due documents for this worker; concurrent workers skip each other's rows.
+    Of several pending uploads of the same content only the oldest is claimable, the
+    others are completed from its result.
+    """
+    now = datetime.now(timezone.utc)
+    earlier = aliased(Document)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Document.id, Document.storage_path, Document.content_hash)
+            .where(
+                Document.status == "PROCESSING",
+                or_(Document.next_attempt_at.is_(None), Document.next_attempt_at <= now),
+                or_(
+                    Document.locked_at.is_(None),
+                    Document.locked_at < now - timedelta(seconds=settings.INGEST_LEASE_SECONDS),
+                ),
+                ~exists().where(
+                    earlier.content_hash == Document.content_hash,
+                    earlier.status == "PROCESSING",
+                    or_(
+                        earlier.created_at < Document.created_at,
+                        and_(earlier.created_at == Document.created_at, earlier.id < Document.id),
+                    ),
+                ),
+            )
+            .order_by(Document.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        jobs = [(row.id, row.storage_path, row.content_hash) for row in result.all()]
+        if jobs:
+            await db.execute(
+                update(Document)
+                .where(Document.id.in_([doc_id for doc_id, _, _ in jobs]))
+                .values(locked_by=worker_id, locked_at=now, attempts=Document.attempts + 1)
+            )
+        await db.commit()
+    return jobs
+
+
+async def _record_failure(document_id: str, error: BaseException):
+    async with AsyncSessionLocal() as db:
+        doc = await db.get(Document, document_id)
+        if not doc:
+            return
+        doc.error_message = str(error)
+        doc.locked_by = None
+        doc.locked_at = None
+        if doc.attempts >= settings.INGEST_MAX_ATTEMPTS:
+            doc.status = "FAILED"
+        else:
+            backoff = min(
+                settings.INGEST_RETRY_BACKOFF_SECONDS * 2 ** (doc.attempts - 1),
+                settings.INGEST_RETRY_BACKOFF_MAX_SECONDS,
+            )
+            doc.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=backoff)
+        await db.commit()
+
+
+async def _release(document_id: str):
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(Document)
+            .where(Document.id == document_id, Document.status == "PROCESSING")
+            .values(locked_by=None, locked_at=None)
+        )
+        await db.commit()
+
+
+async def _collect_if_deleted(document_id: str, content_hash: str | None, file_path: str):
+    """
+    A document deleted mid-ingest was garbage-collected while this job was still
+    writing; collect again now that it has stopped, or its vectors are orphaned.
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            if await db.get(Document, document_id) is not None:
+                return
+        await collect_garbage(content_hash, document_id, file_path)
+    except Exception:
+        logger.exception("Garbage collection for deleted document %s failed", document_id)
+
+
+async def run_job(document_id: str, file_path: str, content_hash: str | None = None):
+    try:
+        async with AsyncSessionLocal() as db:
+            await process_document(document_id, file_path, db)
+    except asyncio.CancelledError:
+        # shutting down: hand the document back, the checkpoint lets the next worker resume
+        await asyncio.shield(_release(document_id))
+        raise
+    except Exception as e:
+        logger.exception("Ingestion of document %s failed", document_id)
+        await _record_failure(document_id, e)
+    finally:
+        await asyncio.shield(_collect_if_deleted(document_id, content_hash, file_path))
+
+
+async def run_worker(worker_id: str | None = None, concurrency: int | None = None):
+    """Claim and process documents until cancelled, at most `concurrency` at a time."""
+    worker_id = worker_id or default_worker_id()
+    concurrency = concurrency or settings.INGEST_WORKER_CONCURRENCY
+    in_flight: set[asyncio.Task] = set()
+
+    try:
+        while True:
+            claimed = []
+            if len(in_flight) < concurrency:
+                try:
+                    claimed = await claim_documents(worker_id, concurrency - len(in_flight))
+                except Exception:
+                    logger.exception("Claiming documents failed")
+
+            for document_id, file_path, content_hash in claimed:
+                task = asyncio.create_task(run_job(document_id, file_path, content_hash))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+
+            if len(in_flight) >= concurrency:
+                await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            elif not claimed:
+                _wakeup.clear()
+                waiters = [asyncio.create_task(_wakeup.wait()), *in_flight]
+                try:
+                    await asyncio.wait(
+                        waiters,
+                        timeout=settings.INGEST_POLL_INTERVAL,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                finally:
+                    waiters[0].cancel()
+    finally:
+        for task in in_flight:
+            task.cancel()
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+        shutdown_extraction_pool()
+
+
+async def reconcile_vector_store():
+    """Requeue COMPLETED documents whose chunks are missing from the vector store, backfill BM25 indexes."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Document.id, Document.content_hash, Document.meta_data).where(Document.status == "COMPLETED")
+        )
+        expected_by_key = {}
+        for doc_id, content_hash, meta_data in result.all():
+            expected_by_key[content_hash or doc_id] = (meta_data or {}).get("chunks_count", 0)
+
+        missing = []
+        for key, expected in expected_by_key.items():
+            if expected and await RAGService.count_chunks(key) < expected:
+                missing.append(key)
+            elif expected and await RAGService.ensure_lexical_index(key, expected):
+                # ingested before the BM25 index existed; built from the stored chunks, no re-embedding
+                logger.info("Built the BM25 index of %s", key)
+
+        if missing:
+            logger.warning("Re-ingesting %d documents missing from the vector store", len(missing))
+            await db.execute(
+                update(Document)
+                .where(
+                    or_(Document.id.in_(missing), Document.content_hash.in_(missing)),
+                    Document.status == "COMPLETED",
+                )
+                .values(
+                    status="PROCESSING",
+                    attempts=0,
+                    next_attempt_at=None,
+                    locked_by=None,
+                    locked_at=None,
+                    error_message=None,
+                )
+            )
+            await db.commit()
+            notify_ingest_queue()
+    return missing
@@ -0,0 +1,184 @@
+import asyncio
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+from cachetools import LRUCache
+from services.rag.vector_store import SearchHit, VectorStore
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Each document is a directory of .npy shards, one per upserted batch until
+    finalize() compacts them, each with a JSON list of its chunk texts. Rows are
+    L2-normalized and memory-mapped, so a query is a dot product over only the
+    requested documents' matrices.
+    """
+
+    def __init__(self, root: str, dtype: str = "float16", cache_size: int = 256):
+        self.root = root
+        self.dtype = np.dtype(dtype)
+        os.makedirs(root, exist_ok=True)
+        # document_id -> (directory mtime, shards); the mtime catches writes from other processes
+        self._cache = LRUCache(maxsize=cache_size)
+        self._lock = threading.Lock()
+
+    def _dir(self, document_id: str) -> str:
+        return os.path.join(self.root, document_id)
+
+    @staticmethod
+    def _shard_path(directory: str, start: int, ext: str) -> str:
+        return os.path.join(directory, f"{start:08d}.{ext}")
+
+    @staticmethod
+    def _shard_starts(directory: str) -> list[int]:
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        return sorted(int(name[:-4]) for name in names if name.endswith(".npy") and name[:-4].isdigit())
+
+    def _write_shard(self, directory: str, start: int, matrix: np.ndarray, texts: list[str]):
+        # texts first: a shard only exists once its .npy is renamed into place
+        json_path = self._shard_path(directory, start, "json")
+        with open(json_path + ".tmp", "w") as f:
+            json.dump(texts, f)
+        os.replace(json_path + ".tmp", json_path)
+
+        npy_path = self._shard_path(directory, start, "npy")
+        with open(npy_path + ".tmp", "wb") as f:
+            np.save(f, matrix)
+        os.replace(npy_path + ".tmp", npy_path)
+
+    def _remove_shard(self, directory: str, start: int):
+        for ext in ("npy", "json"):
+            try:
+                os.remove(self._shard_path(directory, start, ext))
+            except FileNotFoundError:
+                pass
+
+    def _load(self, document_id: str) -> list[tuple[int, np.ndarray, list[str]]]:
+        directory = self._dir(document_id)
+        try:
+            version = os.stat(directory).st_mtime_ns
+        except FileNotFoundError:
+            return []
+
+        with self._lock:
+            cached = self._cache.get(document_id)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        shards, covered = [], 0
+        for start in self._shard_starts(directory):
+            if start < covered:
+                # left behind by an interrupted compaction or rewrite
+                continue
+            matrix = np.load(self._shard_path(directory, start, "npy"), mmap_mode="r")
+            with open(self._shard_path(directory, start, "json")) as f:
+                texts = json.load(f)
+            shards.append((start, matrix, texts))
+            covered = start + len(texts)
+
+        with self._lock:
+            self._cache[document_id] = (version, shards)
+        return shards
+
+    def _invalidate(self, document_id: str):
+        with self._lock:
+            self._cache.pop(document_id, None)
+
+    def _upsert(self, document_id, start_index, embeddings, texts):
+        directory = self._dir(document_id)
+        os.makedirs(directory, exist_ok=True)
+
+        # chunk ids are positional, so writing at start_index replaces everything from there on
+        for start, matrix, shard_texts in self._load(document_id):
+            if start >= start_index:
+                self._remove_shard(directory, start)
+            elif start + len(shard_texts) > start_index:
+                keep = start_index - start
+                self._write_shard(directory, start, np.array(matrix[:keep]), shard_texts[:keep])
+
+        matrix = _normalize(np.asarray(embeddings, dtype=np.float32)).astype(self.dtype)
+        self._write_shard(directory, start_index, matrix, list(texts))
+        self._invalidate(document_id)
+
+    def _query(self, embedding, document_ids, top_k):
+        if document_ids is None:
+            document_ids = os.listdir(self.root)
+
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        scores, refs = [], []
+        for document_id in document_ids:
+            for start, matrix, texts in self._load(document_id):
+                scores.append(matrix @ query.astype(matrix.dtype))
+                refs.append((document_id, start, texts))
+        if not scores:
+            return []
+
+        offsets = np.cumsum([0] + [len(s) for s in scores])
+        scores = np.concatenate(scores).astype(np.float32)
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        hits = []
+        for idx in top:
+            shard = int(np.searchsorted(offsets, idx, side="right")) - 1
+            document_id, start, texts = refs[shard]
+            row = int(idx - offsets[shard])
+            hits.append(SearchHit(
+                id=f"{document_id}_{start + row}",
+                document_id=document_id,
+                text=texts[row],
+                score=float(scores[idx]),
+            ))
+        return hits
+
+    def _delete(self, document_id):
+        shutil.rmtree(self._dir(document_id), ignore_errors=True)
+        self._invalidate(document_id)
+
+    def _count(self, document_id):
+        return sum(len(texts) for _, _, texts in self._load(document_id))
+
+    def _get_chunks(self, document_id):
+        return [text for _, _, texts in self._load(document_id) for text in texts]
+
+    def _finalize(self, document_id):
+        shards = self._load(document_id)
+        if len(shards) <= 1:
+            return
+        directory = self._dir(document_id)
+        matrix = np.concatenate([np.asarray(m) for _, m, _ in shards])
+        texts = [text for _, _, shard_texts in shards for text in shard_texts]
+        self._write_shard(directory, 0, matrix, texts)
+        for start, _, _ in shards[1:]:
+            self._remove_shard(directory, start)
+        self._invalidate(document_id)
+
+    async def upsert(self, document_id, start_index, embeddings, texts):
+        await asyncio.to_thread(self._upsert, document_id, start_index, embeddings, texts)
+
+    async def query(self, embedding, document_ids, top_k):
+        return await asyncio.to_thread(self._query, embedding, document_ids, top_k)
+
+    async def delete(self, document_id):
+        await asyncio.to_thread(self._delete, document_id)
+
+    async def count(self, document_id):
+        return await asyncio.to_thread(self._count, document_id)
+
+    async def get_chunks(self, document_id):
+        return await asyncio.to_thread(self._get_chunks, document_id)
+
+    async def finalize(self, document_id):
+        await asyncio.to_thread(self._finalize, document_id)
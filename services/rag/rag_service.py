@@ -1,31 +1,132 @@
-import hashlib
-from db.chroma_client import collection
-from services.rag.embeddings import embed_text
+import asyncio
+
+from core.config import settings
+from services.chat.response_cache import response_cache
+from services.rag.bm25 import BM25Index, reciprocal_rank_fusion
+from services.rag.cache import normalize_query, rag_cache
+from services.rag.embeddings import aembed_text, aembed_texts
+from services.rag.reranker import rerank
+from services.rag.vector_store import get_vector_store
+
+
+vector_store = get_vector_store()
+# lexical twin of the vector store, same document keys and chunk ids
+lexical_index = BM25Index(settings.BM25_INDEX_PATH, k1=settings.BM25_K1, b=settings.BM25_B)
+
+# query embeddings being computed, so concurrent callers share one encode
+_embedding_tasks: dict[str, asyncio.Task] = {}
 
 
 class RAGService:
 
+    @staticmethod
+    async def upsert_chunks(document_id: str, chunks: list[str], start_index: int = 0):
+        # ids are positional, so re-running a batch after a crash overwrites instead of duplicating
+        embeddings, _ = await asyncio.gather(
+            aembed_texts(chunks),
+            lexical_index.upsert(document_id, start_index, chunks),
+        )
+        await vector_store.upsert(document_id, start_index, embeddings, chunks)
+
+    @staticmethod
+    async def finalize_document(document_id: str):
+        await asyncio.gather(vector_store.finalize(document_id), lexical_index.finalize(document_id))
+        await RAGService.invalidate_caches(document_id)
+
     @staticmethod
     async def add_document_chunks(document_id: str, chunks: list[str]):
-        for idx, chunk in enumerate(chunks):
-            collection.add(
-                ids=[f"{document_id}_{idx}"],
-                embeddings=[embed_text(chunk)],
-                documents=[chunk],
-                metadatas=[{"document_id": document_id}]
-            )
+        batch_size = settings.VECTOR_WRITE_BATCH_SIZE
+        for start in range(0, len(chunks), batch_size):
+            await RAGService.upsert_chunks(document_id, chunks[start:start + batch_size], start_index=start)
+        await RAGService.finalize_document(document_id)
+
+    @staticmethod
+    async def delete_document(document_id: str):
+        await asyncio.gather(vector_store.delete(document_id), lexical_index.delete(document_id))
+        await RAGService.invalidate_caches(document_id)
+
+    @staticmethod
+    async def invalidate_caches(document_id: str):
+        await rag_cache.invalidate_documents([document_id])
+        if response_cache is not None:
+            await response_cache.invalidate_documents([document_id])
+
+    @staticmethod
+    async def count_chunks(document_id: str) -> int:
+        return await vector_store.count(document_id)
 
     @staticmethod
-    async def retrieve(query: str, document_ids: list[str] = None, top_k: int = 3):
-        query_embedding = embed_text(query)
-        
-        where_filter = None
+    async def ensure_lexical_index(document_id: str, expected: int) -> bool:
+        """Builds the BM25 index from stored chunks, for documents ingested before it existed."""
+        if await lexical_index.count(document_id) >= expected:
+            return False
+        chunks = await vector_store.get_chunks(document_id)
+        await lexical_index.upsert(document_id, 0, chunks)
+        await lexical_index.finalize(document_id)
+        await RAGService.invalidate_caches(document_id)
+        return True
+
+    @staticmethod
+    async def get_chunks(document_id: str) -> list[str]:
+        return await vector_store.get_chunks(document_id)
+
+    @staticmethod
+    async def _embed_and_cache(query: str):
+        query_embedding = await aembed_text(query)
+        await rag_cache.set_embedding(query, query_embedding)
+        return query_embedding
+
+    @staticmethod
+    async def embed_query(query: str):
+        query_embedding = await rag_cache.get_embedding(query)
+        if query_embedding is not None:
+            return query_embedding
+
+        key = normalize_query(query)
+        task = _embedding_tasks.get(key)
+        if task is None:
+            task = asyncio.create_task(RAGService._embed_and_cache(query))
+            _embedding_tasks[key] = task
+            task.add_done_callback(lambda _: _embedding_tasks.pop(key, None))
+        # a cancelled caller (e.g. discarded speculative retrieval) mustn't cancel the others
+        return await asyncio.shield(task)
+
+    @staticmethod
+    async def _dense_search(query: str, document_ids: list[str] | None, top_k: int):
+        query_embedding = await RAGService.embed_query(query)
+        return await vector_store.query(query_embedding, document_ids, top_k)
+
+    @staticmethod
+    async def retrieve(query: str, document_ids: list[str] = None, top_k: int | None = None):
+        """
+        Dense and BM25 search run concurrently and are fused by reciprocal rank,
+        so exact terms (part numbers, clause ids) surface even when their
+        embeddings don't; the fused head is optionally reranked by a cross-encoder.
+        """
+        top_k = top_k or settings.RETRIEVAL_TOP_K
+        mode = ("hybrid" if settings.HYBRID_SEARCH else "dense") + ("+rerank" if settings.RERANK_ENABLED else "")
+        cache_key = None
         if document_ids:
-            where_filter = {"document_id": {"$in": document_ids}}
-        
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=top_k,
-            where=where_filter
-        )
-        return results["documents"][0] if results["documents"] else []
+            cache_key = await rag_cache.retrieval_key(query, document_ids, top_k, mode)
+            cached = await rag_cache.get_retrieval(cache_key)
+            if cached is not None:
+                return cached
+
+        document_ids = document_ids or None
+        rerank_n = max(top_k, settings.RERANK_TOP_N) if settings.RERANK_ENABLED else top_k
+        if settings.HYBRID_SEARCH:
+            candidates = max(rerank_n, settings.HYBRID_CANDIDATES)
+            dense_hits, lexical_hits = await asyncio.gather(
+                RAGService._dense_search(query, document_ids, candidates),
+                lexical_index.query(query, document_ids, candidates),
+            )
+            hits = reciprocal_rank_fusion([dense_hits, lexical_hits], k=settings.RRF_K)
+        else:
+            hits = await RAGService._dense_search(query, document_ids, rerank_n)
+
+        if settings.RERANK_ENABLED:
+            hits = await rerank(query, hits[:rerank_n])
+
+        chunks = [hit.text for hit in hits[:top_k]]
+        await rag_cache.set_retrieval(cache_key, chunks)
+        return chunks
@@ -0,0 +1,34 @@
+import asyncio
+import threading
+
+from sentence_transformers import CrossEncoder
+from core.config import settings
+from services.rag.vector_store import SearchHit
+
+
+_model: CrossEncoder | None = None
+_lock = threading.Lock()
+
+
+def load_reranker() -> CrossEncoder:
+    # only loaded when RERANK_ENABLED, it's another model in memory
+    global _model
+    with _lock:
+        if _model is None:
+            _model = CrossEncoder(settings.RERANK_MODEL, device="cpu")
+    return _model
+
+
+def _rerank(query: str, hits: list[SearchHit]) -> list[SearchHit]:
+    scores = load_reranker().predict([(query, hit.text) for hit in hits], show_progress_bar=False)
+    ranked = sorted(zip(hits, scores), key=lambda pair: -pair[1])
+    return [
+        SearchHit(id=hit.id, document_id=hit.document_id, text=hit.text, score=float(score))
+        for hit, score in ranked
+    ]
+
+
+async def rerank(query: str, hits: list[SearchHit]) -> list[SearchHit]:
+    if not hits:
+        return hits
+    return await asyncio.to_thread(_rerank, query, hits)
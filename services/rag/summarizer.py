@@ -0,0 +1,77 @@
+import asyncio
+import logging
+
+from core.config import settings
+from utils.tokenizer import get_tokenizer
+from services.llm.factory import get_llm_client
+from services.rag.rag_service import RAGService
+
+
+logger = logging.getLogger(__name__)
+
+MAP_PROMPT = (
+    "Summarize this excerpt of a longer document. "
+    "Keep the key facts, names, numbers and conclusions."
+)
+REDUCE_PROMPT = (
+    "These are summaries of consecutive parts of one document, in order. "
+    "Combine them into a single coherent summary without repeating yourself."
+)
+
+
+def _pack(texts: list[str], max_tokens: int, tokenizer) -> list[list[str]]:
+    """Groups consecutive texts so each group fits in `max_tokens`."""
+    groups, current, used = [], [], 0
+    for text in texts:
+        tokens = tokenizer.count(text)
+        if current and used + tokens > max_tokens:
+            groups.append(current)
+            current, used = [], 0
+        current.append(text)
+        used += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+async def summarize_texts(llm, texts: list[str]) -> str:
+    """
+    Map-reduce: summarize groups of consecutive texts in parallel, then keep merging
+    the partial summaries group by group until one is left. At most
+    DOCUMENT_SUMMARY_CONCURRENCY calls are in flight.
+    """
+    if not texts:
+        return ""
+    tokenizer = get_tokenizer()
+    semaphore = asyncio.Semaphore(settings.DOCUMENT_SUMMARY_CONCURRENCY)
+
+    async def summarize(prompt: str, group: list[str], max_tokens: int) -> str:
+        async with semaphore:
+            return await llm.generate(
+                messages=[
+                    {"role": "system", "content": prompt},
+                    {"role": "user", "content": "\n\n".join(group)},
+                ],
+                temperature=0,
+                max_tokens=max_tokens,
+            )
+
+    def max_tokens_for(groups):
+        return settings.DOCUMENT_SUMMARY_MAX_TOKENS if len(groups) == 1 else settings.DOCUMENT_SUMMARY_PARTIAL_TOKENS
+
+    groups = _pack(texts, settings.DOCUMENT_SUMMARY_GROUP_TOKENS, tokenizer)
+    partials = await asyncio.gather(*(summarize(MAP_PROMPT, g, max_tokens_for(groups)) for g in groups))
+
+    while len(partials) > 1:
+        groups = _pack(partials, settings.DOCUMENT_SUMMARY_GROUP_TOKENS, tokenizer)
+        if len(groups) == len(partials):
+            # every partial fills a group on its own; merge pairwise so each level still shrinks
+            groups = [partials[i:i + 2] for i in range(0, len(partials), 2)]
+        partials = await asyncio.gather(*(summarize(REDUCE_PROMPT, g, max_tokens_for(groups)) for g in groups))
+
+    return partials[0].strip()
+
+
+async def summarize_document(vector_key: str) -> str:
+    chunks = await RAGService.get_chunks(vector_key)
+    return await summarize_texts(get_llm_client(), chunks)
@@ -0,0 +1,55 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from core.config import settings
+
+
+@dataclass
+class SearchHit:
+    id: str
+    document_id: str
+    text: str
+    score: float  # higher is more similar
+
+
+class VectorStore(ABC):
+    """Chunk embeddings grouped by document; chunk ids are `{document_id}_{index}`."""
+
+    @abstractmethod
+    async def upsert(self, document_id: str, start_index: int, embeddings: list[list[float]], texts: list[str]):
+        ...
+
+    @abstractmethod
+    async def query(self, embedding: list[float], document_ids: list[str] | None, top_k: int) -> list[SearchHit]:
+        ...
+
+    @abstractmethod
+    async def delete(self, document_id: str):
+        ...
+
+    @abstractmethod
+    async def count(self, document_id: str) -> int:
+        ...
+
+    @abstractmethod
+    async def get_chunks(self, document_id: str) -> list[str]:
+        """Every chunk text of a document, in order."""
+
+    async def finalize(self, document_id: str):
+        """Called once every chunk of a document has been written."""
+
+
+_vector_store: VectorStore | None = None
+
+
+def get_vector_store() -> VectorStore:
+    global _vector_store
+    if _vector_store is None:
+        if settings.VECTOR_STORE == "chroma":
+            from services.rag.chroma_store import ChromaVectorStore
+            _vector_store = ChromaVectorStore()
+        elif settings.VECTOR_STORE == "numpy":
+            from services.rag.numpy_store import NumpyVectorStore
+            _vector_store = NumpyVectorStore(settings.VECTOR_STORE_PATH, dtype=settings.VECTOR_STORE_DTYPE)
+        else:
+            raise ValueError("Unsupported VECTOR_STORE")
+    return _vector_store
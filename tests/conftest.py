@@ -0,0 +1,9 @@
+import os
+import sys
+
+# core.config needs these to import; the tests never connect to anything
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://localhost/test")
+os.environ.setdefault("ALEMBIC_DATABASE_URL", "postgresql://localhost/test")
+os.environ.setdefault("SECRET_KEY", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
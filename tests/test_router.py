@@ -0,0 +1,147 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services.llm.base import Finish, TextDelta
+from services.llm.mock_client import MockLLMClient
+from services.llm.router import LLMRouter
+
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+def fake(provider: str, latency_ms: float = 0, error_rate: float = 0) -> MockLLMClient:
+    # the provider name doubles as the model, so Finish tells which provider answered
+    return MockLLMClient(
+        tokens_per_sec=10_000,
+        latency_ms=latency_ms,
+        response_tokens=5,
+        model=provider,
+        error_rate=error_rate,
+        provider=provider,
+    )
+
+
+async def stream(router: LLMRouter) -> str:
+    events = [event async for event in router.stream_generate(MESSAGES, temperature=0, max_tokens=16)]
+    assert any(isinstance(event, TextDelta) for event in events)
+    return next(event.model for event in events if isinstance(event, Finish))
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_ranks_by_measured_ttft():
+    async def scenario():
+        router = LLMRouter([fake("slow", latency_ms=60), fake("fast", latency_ms=5)])
+        # both unmeasured: the first is tried, then the other one because it scores 0
+        assert await stream(router) == "slow"
+        assert await stream(router) == "fast"
+        assert [await stream(router) for _ in range(3)] == ["fast"] * 3
+        assert router.model == "fast"
+
+    run(scenario())
+
+
+def test_fails_over_before_first_token():
+    async def scenario():
+        router = LLMRouter([fake("broken", error_rate=1), fake("ok", latency_ms=5)], breaker_failures=10)
+        assert await stream(router) == "ok"
+        stats = router.stats()
+        assert stats["broken"]["error_rate"] == 1.0
+        assert stats["ok"]["error_rate"] == 0.0
+        # a provider that only fails has no latency, but still ranks behind the healthy one
+        assert await stream(router) == "ok"
+        assert router.stats()["broken"]["error_rate"] == 1.0
+
+    run(scenario())
+
+
+def test_all_providers_failing_raises_the_last_error():
+    async def scenario():
+        router = LLMRouter([fake("a", error_rate=1), fake("b", error_rate=1)])
+        with pytest.raises(httpx.HTTPStatusError, match="b: injected failure"):
+            await stream(router)
+
+    run(scenario())
+
+
+def test_breaker_opens_and_half_opens():
+    async def scenario():
+        broken, ok = fake("broken", error_rate=1), fake("ok", latency_ms=5)
+        router = LLMRouter([broken, ok], breaker_failures=2, breaker_cooldown=0.05)
+        stats = router.stats_by_provider["broken"]
+
+        assert await stream(router) == "ok"
+        assert stats.state == "closed"
+        # once it ranks last it only gets traffic when the others fail too
+        ok.error_rate = 1
+        with pytest.raises(httpx.HTTPStatusError):
+            await stream(router)
+        assert stats.state == "open"
+        assert [c.provider for c in router._ranked()] == ["ok"]
+
+        # after the cooldown it takes trial requests; a failed trial re-opens it at once
+        await asyncio.sleep(0.06)
+        assert stats.state == "half_open"
+        with pytest.raises(httpx.HTTPStatusError):
+            await stream(router)
+        assert stats.state == "open"
+
+        # and a successful trial closes it
+        await asyncio.sleep(0.06)
+        broken.error_rate = 0
+        assert await stream(router) == "broken"
+        assert stats.state == "closed"
+
+    run(scenario())
+
+
+def test_hedge_winner_and_loser_accounting():
+    async def scenario():
+        router = LLMRouter(
+            [fake("slow", latency_ms=300), fake("fast", latency_ms=5)],
+            hedge=True,
+            hedge_min_delay=0.01,
+            hedge_max_delay=0.03,
+        )
+        assert await stream(router) == "fast"
+
+        slow, fast = router.stats_by_provider["slow"], router.stats_by_provider["fast"]
+        # the winner's TTFT is measured from its own start, not the primary's
+        assert fast.latencies[0] < 0.03
+        # the loser didn't fail, it was only slower than the time it was given
+        assert list(slow.outcomes) == []
+        assert slow.latencies[0] >= 0.03
+        assert slow.state == "closed"
+        assert router._ranked()[0].provider == "fast"
+
+    run(scenario())
+
+
+def test_no_hedge_when_primary_is_on_time():
+    async def scenario():
+        router = LLMRouter(
+            [fake("primary", latency_ms=5), fake("backup", latency_ms=5)],
+            hedge=True,
+            hedge_min_delay=0.1,
+            hedge_max_delay=0.2,
+        )
+        assert await stream(router) == "primary"
+        assert list(router.stats_by_provider["backup"].latencies) == []
+
+    run(scenario())
+
+
+def test_generate_fails_over_and_stays_out_of_ttft_stats():
+    async def scenario():
+        router = LLMRouter([fake("broken", error_rate=1), fake("ok", latency_ms=20)], breaker_failures=10)
+        assert await router.generate(MESSAGES, max_tokens=16)
+        ok = router.stats_by_provider["ok"]
+        assert list(ok.latencies) == []
+        assert len(ok.completion_latencies) == 1
+        assert router.stats()["ok"]["p50_ttft_ms"] is None
+
+    run(scenario())
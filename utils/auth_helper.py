@@ -1,6 +1,6 @@
 
 from jose import JWTError, jwt
-from datetime import datetime, timedelta,time,timezone
+from datetime import datetime, timedelta,timezone
 from core.config import settings
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import HTTPException, status
@@ -9,12 +9,64 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends,HTTPException,status
 from db.session import get_db
 from db.models.user import User
-from sqlalchemy import select
+from sqlalchemy import select, event, inspect
+from dataclasses import dataclass
+from cachetools import TTLCache
+import time
 
 
 
 oauth_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as seen by endpoints; never carries the password hash."""
+    id: str
+    email: str
+
+
+# token jti -> (principal, cached at); short TTL bounds how long a stale entry can live
+_principal_cache = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL)
+# email -> invalidated at; only needs to outlive the cache entries it shadows
+_invalidated_users = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL)
+
+
+def _cache_key(payload: dict) -> str:
+    return payload.get("jti") or f"{payload.get('sub')}:{payload.get('exp')}"
+
+
+def _get_cached_principal(key: str) -> Principal | None:
+    entry = _principal_cache.get(key)
+    if entry is None:
+        return None
+    principal, cached_at = entry
+    invalidated_at = _invalidated_users.get(principal.email)
+    if invalidated_at is not None and invalidated_at >= cached_at:
+        _principal_cache.pop(key, None)
+        return None
+    return principal
+
+
+def invalidate_user(email: str):
+    """Drop cached principals for a user, e.g. after a password change or deletion."""
+    _invalidated_users[email] = time.monotonic()
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_deleted_user(mapper, connection, target):
+    invalidate_user(target.email)
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_updated_user(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.password.history.has_changes() or state.attrs.email.history.has_changes():
+        invalidate_user(target.email)
+        for old_email in state.attrs.email.history.deleted:
+            invalidate_user(old_email)
+
+
 async def create_token(data: dict, type: str,expires_minutes: int):
     try:
 
@@ -51,12 +103,19 @@ async def verify_user(token: str = Depends(oauth_scheme), db: AsyncSession = Dep
     except JWTError:
         raise credentials_exception
     
+    key = _cache_key(payload)
+    principal = _get_cached_principal(key)
+    if principal is not None:
+        return principal
+
     email: str = payload.get("sub")
-    user = await db.execute(select(User.email, User.password, User.id).filter(User.email == email))
+    user = await db.execute(select(User.email, User.id).filter(User.email == email))
     user = user.first()
     if user is None:
         raise credentials_exception
-    return user
+    principal = Principal(id=user.id, email=user.email)
+    _principal_cache[key] = (principal, time.monotonic())
+    return principal
 
 
 async def verify_refresh_token(token: str,db: AsyncSession):
@@ -75,7 +134,7 @@ async def verify_refresh_token(token: str,db: AsyncSession):
         raise credentials_exception
     
     email: str = payload.get("sub")
-    user = await db.execute(select(User.email, User.password, User.id).filter(User.email == email))
+    user = await db.execute(select(User.email, User.id).filter(User.email == email))
     user = user.first()
     if user is None:
         raise credentials_exception
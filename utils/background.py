@@ -0,0 +1,22 @@
+import asyncio
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+# the event loop only keeps weak references to tasks
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _on_done(task: asyncio.Task):
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception():
+        logger.error("Background task failed", exc_info=task.exception())
+
+
+def run_in_background(coro) -> asyncio.Task:
+    """Fire-and-forget a coroutine off the response path."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_on_done)
+    return task
@@ -1,7 +1,83 @@
+import asyncio
+import logging
+import numpy as np
+from core.config import settings
+from services.rag.embeddings import aembed_texts
+from services.rag.rag_service import RAGService
 
 
+logger = logging.getLogger(__name__)
 
-async def classify_intent(llm, message: str) -> str:
+INTENT_LABELS = ("OPEN_CHAT", "DOCUMENT_QA", "DOCUMENT_SUMMARY")
+
+# a handful of phrasings per label; their mean embedding is the label centroid
+INTENT_EXEMPLARS = {
+    "OPEN_CHAT": [
+        "Hello, how are you?",
+        "Tell me a joke",
+        "What can you help me with?",
+        "Write a poem about the sea",
+        "Explain how neural networks work",
+        "What's the capital of France?",
+        "Thanks, that was helpful",
+        "Can you give me some advice on learning Python?",
+    ],
+    "DOCUMENT_QA": [
+        "What does the document say about the refund policy?",
+        "According to the file, what is the deadline?",
+        "Find the section about payment terms in the PDF",
+        "Who is mentioned as the author in this document?",
+        "What are the requirements listed in the uploaded file?",
+        "In the report, what was the revenue for last year?",
+        "Does the contract mention a termination clause?",
+        "Where in the document is the warranty described?",
+    ],
+    "DOCUMENT_SUMMARY": [
+        "Summarize this document",
+        "Give me a summary of the PDF",
+        "What is this document about?",
+        "Can you provide an overview of the uploaded file?",
+        "Give me the key points of the report",
+        "TL;DR of the document please",
+        "Summarize the main ideas of this file in a few bullet points",
+        "Briefly describe what the PDF covers",
+    ],
+}
+
+_centroids: np.ndarray | None = None
+_centroids_lock = asyncio.Lock()
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+async def _get_centroids() -> np.ndarray:
+    global _centroids
+    if _centroids is None:
+        async with _centroids_lock:
+            if _centroids is None:
+                centroids = []
+                for label in INTENT_LABELS:
+                    exemplars = _normalize(np.asarray(await aembed_texts(INTENT_EXEMPLARS[label])))
+                    centroids.append(exemplars.mean(axis=0))
+                _centroids = _normalize(np.stack(centroids))
+    return _centroids
+
+
+async def classify_intent_locally(message: str) -> tuple[str, float, float]:
+    """Nearest-centroid intent; returns (label, best similarity, margin over the runner-up)."""
+    centroids = await _get_centroids()
+    # shared with retrieval, which embeds the same message at the same time
+    query = _normalize(np.asarray(await RAGService.embed_query(message)))
+    scores = centroids @ query
+    ranked = np.argsort(scores)[::-1]
+    best, runner_up = scores[ranked[0]], scores[ranked[1]]
+    return INTENT_LABELS[ranked[0]], float(best), float(best - runner_up)
+
+
+async def classify_intent_with_llm(llm, message: str) -> str | None:
     prompt = [
         {
             "role": "system",
@@ -23,4 +99,22 @@ async def classify_intent(llm, message: str) -> str:
         max_tokens=20
     )
 
-    return response.strip()
\ No newline at end of file
+    response = response.strip().upper()
+    for label in INTENT_LABELS:
+        if label in response:
+            return label
+    return None
+
+
+async def classify_intent(llm, message: str) -> str:
+    label, score, margin = await classify_intent_locally(message)
+    if score >= settings.INTENT_CONFIDENCE_THRESHOLD and margin >= settings.INTENT_MARGIN:
+        return label
+
+    # ambiguous message, ask the LLM and keep the local guess if it can't give a valid label
+    try:
+        llm_label = await classify_intent_with_llm(llm, message)
+    except Exception:
+        logger.exception("LLM intent classification failed")
+        llm_label = None
+    return llm_label or label
@@ -1,17 +1,30 @@
 
 from sqlalchemy import select
+from core.config import settings
+from db.session import AsyncSessionLocal
 from db.models.conversation import Conversation
 from db.models.message import Message
+from services.llm.factory import get_llm_client
 
 
-async def create_older_context(db, conversation:Conversation):
+def _summary_seq(conversation: Conversation) -> int:
+    return (conversation.meta_data or {}).get("summary_seq", 0)
 
-    #for short intial conversations (when summary is not available)
+
+async def create_older_context(db, conversation:Conversation, before_seq: int | None = None):
+
+    # everything up to summary_seq is folded into conversation_summary; the rest is sent
+    # verbatim, which is at most the window plus the turns waiting for the next fold
+    query = select(Message).where(
+        Message.conversation_id == conversation.id,
+        Message.sequence_number > _summary_seq(conversation),
+    )
+    if before_seq is not None:
+        query = query.where(Message.sequence_number < before_seq)
     msgs = await db.execute(
-        select(Message)
-        .where(Message.conversation_id == conversation.id)
+        query
         .order_by(Message.sequence_number.desc())
-        .limit(6)
+        .limit(settings.CONTEXT_HISTORY_MESSAGES + 2 * settings.SUMMARY_EVERY_N_TURNS)
     )
     
     messages = []
@@ -25,3 +38,77 @@ async def create_older_context(db, conversation:Conversation):
         messages.append({"role": m.role, "content": m.content})
 
     return messages
+
+
+_summarizing: set[str] = set()
+
+
+async def update_conversation_summary(conversation_id: str):
+    """
+    Fold messages that have aged out of the history window into conversation_summary.
+    Runs every SUMMARY_EVERY_N_TURNS turns; meta_data["summary_seq"] is the high-water mark.
+    """
+    if conversation_id in _summarizing:
+        return
+    _summarizing.add(conversation_id)
+    try:
+        async with AsyncSessionLocal() as db:
+            conv = await db.get(Conversation, conversation_id)
+            if not conv:
+                return
+            summary_seq = _summary_seq(conv)
+
+            # newest message outside the window
+            aged_out_seq = await db.scalar(
+                select(Message.sequence_number)
+                .where(Message.conversation_id == conversation_id)
+                .order_by(Message.sequence_number.desc())
+                .offset(settings.CONTEXT_HISTORY_MESSAGES)
+                .limit(1)
+            )
+            if aged_out_seq is None or aged_out_seq - summary_seq < 2 * settings.SUMMARY_EVERY_N_TURNS:
+                return
+
+            msgs = await db.execute(
+                select(Message.role, Message.content)
+                .where(
+                    Message.conversation_id == conversation_id,
+                    Message.sequence_number > summary_seq,
+                    Message.sequence_number <= aged_out_seq,
+                )
+                .order_by(Message.sequence_number)
+            )
+            transcript = "\n".join(f"{m.role}: {m.content}" for m in msgs.all())
+
+            summary = await get_llm_client().generate(
+                messages=[
+                    {
+                        "role": "system",
+                        "content": (
+                            "You maintain a running summary of a conversation. "
+                            "Merge the new messages into the existing summary. Keep facts, "
+                            "decisions, names and open questions; drop pleasantries. "
+                            "Return only the updated summary."
+                        )
+                    },
+                    {
+                        "role": "user",
+                        "content": (
+                            f"Existing summary:\n{conv.conversation_summary or '(none)'}\n\n"
+                            f"New messages:\n{transcript}"
+                        )
+                    }
+                ],
+                temperature=0.1,
+                max_tokens=settings.SUMMARY_MAX_TOKENS
+            )
+
+            # another worker may have folded the same messages meanwhile
+            await db.refresh(conv)
+            if _summary_seq(conv) != summary_seq:
+                return
+            conv.conversation_summary = summary.strip()
+            conv.meta_data = {**(conv.meta_data or {}), "summary_seq": aged_out_seq}
+            await db.commit()
+    finally:
+        _summarizing.discard(conversation_id)
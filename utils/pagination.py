@@ -0,0 +1,18 @@
+import base64
+import orjson
+from fastapi import HTTPException, status
+
+
+def encode_cursor(data: dict) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(data)).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        position = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, orjson.JSONDecodeError):
+        position = None
+    # valid base64 JSON can still be a number or a list ("MQ" is 1)
+    if not isinstance(position, dict):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return position
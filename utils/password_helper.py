@@ -0,0 +1,93 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from core.config import settings
+
+
+@lru_cache
+def _crypt_context(rounds: int) -> CryptContext:
+    # hashes below min_rounds report needs_update, which is how they get upgraded on login
+    return CryptContext(
+        schemes=["pbkdf2_sha256"],
+        pbkdf2_sha256__default_rounds=rounds,
+        pbkdf2_sha256__min_rounds=rounds,
+    )
+
+
+# module-level so they can be pickled into a process pool
+def _hash(password: str, rounds: int) -> str:
+    return _crypt_context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, password_hash: str, rounds: int) -> tuple[bool, str | None]:
+    return _crypt_context(rounds).verify_and_update(password, password_hash)
+
+
+class PasswordHasher:
+    """
+    Runs pbkdf2 off the event loop on a bounded pool. At most `max_workers` hashes run
+    at once, callers beyond that wait in line, and past `max_queue` waiters new
+    requests are rejected instead of piling up.
+    """
+
+    def __init__(self, executor: str, max_workers: int, max_queue: int, rounds: int):
+        if executor == "process":
+            # spawn: forking a process that already runs threads and an event loop is not safe
+            self._executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._semaphore = asyncio.Semaphore(max_workers)
+        self._max_queue = max_queue
+        self.rounds = rounds
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.rejected = 0
+
+    async def _run(self, fn, *args):
+        if self.queued >= self._max_queue:
+            self.rejected += 1
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Server busy, try again")
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password, self.rounds)
+
+    async def verify_and_update(self, password: str, password_hash: str) -> tuple[bool, str | None]:
+        """Returns (valid, new_hash); new_hash is set when the stored hash uses outdated parameters."""
+        return await self._run(_verify_and_update, password, password_hash, self.rounds)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "rejected": self.rejected,
+        }
+
+
+password_hasher = PasswordHasher(
+    executor=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    rounds=settings.PASSWORD_HASH_ROUNDS,
+)
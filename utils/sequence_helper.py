@@ -0,0 +1,17 @@
+from sqlalchemy import update
+from db.models.conversation import Conversation
+
+
+async def allocate_sequence_number(db, conversation_id: str) -> int:
+    """
+    Atomically reserve the next Message.sequence_number for a conversation.
+    The row lock is held until the caller commits, so commit soon after.
+    """
+    result = await db.execute(
+        update(Conversation)
+        .where(Conversation.id == conversation_id)
+        .values(next_seq=Conversation.next_seq + 1)
+        .returning(Conversation.next_seq)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one()
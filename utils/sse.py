@@ -0,0 +1,101 @@
+import asyncio
+from typing import AsyncIterable, AsyncIterator
+
+from services.llm.base import TextDelta
+
+
+async def iter_sse_data(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """
+    Yields the data of each server-sent event from a raw byte stream. Multi-line events
+    are joined with newlines as the spec says; comments and other fields are skipped.
+    Works on bytes so the payload can go straight to orjson without decoding.
+    """
+    buffer = b""
+    data: list[bytes] = []
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while (end := buffer.find(b"\n", start)) != -1:
+            line = buffer[start:end]
+            start = end + 1
+            if line.endswith(b"\r"):
+                line = line[:-1]
+
+            if not line:
+                # blank line ends the event
+                if data:
+                    yield data[0] if len(data) == 1 else b"\n".join(data)
+                    data = []
+            elif line.startswith(b"data:"):
+                value = line[5:]
+                data.append(value[1:] if value.startswith(b" ") else value)
+        buffer = buffer[start:]
+
+    if buffer.startswith(b"data:"):
+        value = buffer[5:].rstrip(b"\r")
+        data.append(value[1:] if value.startswith(b" ") else value)
+    if data:
+        yield b"\n".join(data)
+
+
+async def coalesce_deltas(events: AsyncIterable, max_chars: int, max_delay: float) -> AsyncIterator:
+    """
+    Merges consecutive TextDeltas until `max_chars` are buffered or `max_delay` seconds
+    have passed since the first one, so tiny tokens go out as fewer, larger frames.
+    Other events flush the buffer and pass through in order.
+    """
+    if max_chars <= 0 and max_delay <= 0:
+        async for event in events:
+            yield event
+        return
+
+    iterator = events.__aiter__()
+    loop = asyncio.get_running_loop()
+    parts: list[str] = []
+    size = 0
+    deadline = None
+    pending: asyncio.Future | None = None
+
+    try:
+        while True:
+            if not parts and pending is None:
+                # nothing buffered, so there is no deadline to wait against
+                try:
+                    event = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+            else:
+                if pending is None:
+                    pending = asyncio.ensure_future(iterator.__anext__())
+                timeout = max(deadline - loop.time(), 0) if parts and max_delay > 0 else None
+                done, _ = await asyncio.wait({pending}, timeout=timeout)
+                if not done:
+                    yield TextDelta("".join(parts))
+                    parts, size, deadline = [], 0, None
+                    continue
+                future, pending = pending, None
+                try:
+                    event = future.result()
+                except StopAsyncIteration:
+                    break
+
+            if isinstance(event, TextDelta):
+                if not parts:
+                    deadline = loop.time() + max_delay
+                parts.append(event.content)
+                size += len(event.content)
+                if max_chars > 0 and size >= max_chars:
+                    yield TextDelta("".join(parts))
+                    parts, size, deadline = [], 0, None
+                continue
+
+            if parts:
+                yield TextDelta("".join(parts))
+                parts, size, deadline = [], 0, None
+            yield event
+
+        if parts:
+            yield TextDelta("".join(parts))
+    finally:
+        if pending is not None:
+            pending.cancel()
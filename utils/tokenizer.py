@@ -0,0 +1,65 @@
+import copy
+import math
+import threading
+
+from core.config import settings
+
+
+class HeuristicTokenizer:
+    """~4 characters per token, close enough for English prose and free to compute."""
+
+    def count(self, text: str) -> int:
+        return math.ceil(len(text) / 4)
+
+
+class HFTokenizer:
+    """
+    Counts with a Hugging Face fast tokenizer. Those aren't safe to share between
+    threads: a call that switches truncation or padding while another thread encodes
+    fails with "Already borrowed". So this never touches a tokenizer anyone else
+    uses, and every thread encodes with its own copy of the one it was given.
+    """
+
+    def __init__(self, tokenizer):
+        self._template = tokenizer
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def tokenizer(self):
+        tokenizer = getattr(self._local, "tokenizer", None)
+        if tokenizer is None:
+            with self._lock:
+                tokenizer = copy.deepcopy(self._template)
+            self._local.tokenizer = tokenizer
+        return tokenizer
+
+    def count(self, text: str) -> int:
+        return len(self.tokenizer.encode(text, add_special_tokens=False, verbose=False))
+
+
+_embedding_tokenizer: HFTokenizer | None = None
+_tokenizer = None
+_lock = threading.Lock()
+
+
+def embedding_tokenizer() -> HFTokenizer:
+    """The embedding model's vocabulary, loaded separately from the instance SentenceTransformer encodes with."""
+    global _embedding_tokenizer
+    with _lock:
+        if _embedding_tokenizer is None:
+            from transformers import AutoTokenizer
+            from services.rag.embeddings import _embedding_model
+            _embedding_tokenizer = HFTokenizer(AutoTokenizer.from_pretrained(_embedding_model.tokenizer.name_or_path))
+    return _embedding_tokenizer
+
+
+def get_tokenizer():
+    """Counts prompt tokens, as configured by PROMPT_TOKENIZER."""
+    global _tokenizer
+    if _tokenizer is None:
+        if settings.PROMPT_TOKENIZER == "embedding":
+            _tokenizer = embedding_tokenizer()
+        else:
+            _tokenizer = HeuristicTokenizer()
+    return _tokenizer
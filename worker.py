@@ -0,0 +1,32 @@
+import asyncio
+import logging
+import multiprocessing
+
+from core.config import settings
+
+
+def run_process(index: int):
+    from services.rag.ingest_queue import default_worker_id, run_worker
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(run_worker(f"{default_worker_id()}-{index}", settings.INGEST_WORKER_CONCURRENCY))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    # each process owns its own DB engine and embedding model, so use spawn rather than fork
+    ctx = multiprocessing.get_context("spawn")
+    processes = [
+        ctx.Process(target=run_process, args=(index,), name=f"ingest-worker-{index}")
+        for index in range(settings.INGEST_WORKER_PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()